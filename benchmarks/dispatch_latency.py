@@ -0,0 +1,116 @@
+"""
+Macro trigger latency while the GUI thread is blocked.
+
+Streams press/release pairs into RawInputReceiver and measures socket send ->
+run_macro call. A simulated GUI thread services queued signals but stalls for
+--block-ms out of every --period-ms (a modal dialog, a slow repaint, a table
+rebuild). "gui" routes batches through that thread like the old signal path;
+"dispatch" runs live.on_raw_input_batch on the receiver's dispatch thread.
+
+Run from the repo root:
+    python -m benchmarks.dispatch_latency --events 400 --block-ms 200
+"""
+import argparse
+import json
+import queue
+import socket
+import threading
+import time
+
+import logic.live as live_logic
+from components.RawInputReceiver import RawInputReceiver
+from components.VirtualButton import VirtualButton
+from benchmarks.headless import HeadlessWindow
+
+
+def _bench_window(gui_queue):
+    vb = VirtualButton("Bench", 0, 0)
+    vb.mapped_key = "kp_1"
+    vb.assigned_macro_id = "bench"
+    return HeadlessWindow([vb], {"bench": {"name": "Bench", "steps": []}},
+                          {"device_filtering": False}, gui_queue)
+
+
+def _gui_thread(gui_queue, stop, block_s, period_s):
+    next_block = time.perf_counter() + period_s
+    while not stop.is_set():
+        if time.perf_counter() >= next_block:
+            time.sleep(block_s)  # GUI busy: nothing queued gets serviced
+            next_block += period_s
+        try:
+            item = gui_queue.get(timeout=0.001)
+        except queue.Empty:
+            continue
+        if callable(item):
+            item()
+
+
+def run_mode(mode, events, rate, block_s, period_s):
+    gui_queue = queue.Queue()
+    stop = threading.Event()
+    gui = threading.Thread(target=_gui_thread, args=(gui_queue, stop, block_s, period_s), daemon=True)
+    gui.start()
+
+    window = _bench_window(gui_queue)
+    latencies = []
+    done = threading.Event()
+
+    def fake_run_macro(parent, macro_id, *stamps):
+        latencies.append(time.perf_counter() - parent.current_sent)
+        if len(latencies) >= events:
+            done.set()
+
+    live_logic.run_macro = fake_run_macro
+    # Matching in live.on_raw_input doesn't look at the bench stamp, so keep it on the window
+    def handle(batch):
+        for event in batch:
+            window.current_sent = event["bench_sent"]
+            live_logic.on_raw_input(window, event)
+
+    receiver = RawInputReceiver(listen_port=0, discovery_port=0)
+    if mode == "dispatch":
+        receiver.set_dispatch_handler(handle)
+    else:
+        receiver.raw_input_batch_signal.connect(lambda batch: gui_queue.put(lambda: handle(batch)))
+    receiver.start()
+
+    client = socket.create_connection(("127.0.0.1", receiver.listen_port))
+    device = {"vid": "046d", "pid": "c077", "product_name": "Bench Pad"}
+    interval = 1.0 / rate
+    for _ in range(events):
+        for action in ("press", "release"):
+            client.sendall((json.dumps({
+                "device": device,
+                "event": {"keyname": "kp_1", "action": action},
+                "bench_sent": time.perf_counter(),
+            }) + "\n").encode())
+        time.sleep(interval)
+
+    done.wait(timeout=block_s * 4 + 5)
+    client.close()
+    receiver.stop()
+    stop.set()
+
+    latencies.sort()
+    pick = lambda pct: latencies[min(len(latencies) - 1, int(pct / 100.0 * len(latencies)))] * 1e3 if latencies else 0.0
+    return len(latencies), pick(50), pick(95), pick(99), (latencies[-1] * 1e3 if latencies else 0.0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--events", type=int, default=400)
+    ap.add_argument("--rate", type=float, default=200.0, help="key presses per second")
+    ap.add_argument("--block-ms", type=float, default=200.0)
+    ap.add_argument("--period-ms", type=float, default=500.0)
+    args = ap.parse_args()
+
+    print(f"GUI blocked {args.block_ms:.0f} ms every {args.period_ms:.0f} ms")
+    print(f"{'mode':>9} {'triggers':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("gui", "dispatch"):
+        n, p50, p95, p99, mx = run_mode(mode, args.events, args.rate,
+                                         args.block_ms / 1000.0, args.period_ms / 1000.0)
+        print(f"{mode:>9} {n:>9} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {mx:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
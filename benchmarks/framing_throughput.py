@@ -0,0 +1,100 @@
+"""
+Throughput of the receiver's NDJSON framing over a single connection.
+
+"framer" feeds a pre-encoded burst through FrameBuffer + codec.loads in memory;
+"socket" streams the same events over one TCP connection into RawInputReceiver
+and counts what comes out of raw_input_signal.
+
+Run from the repo root:
+    python -m benchmarks.framing_throughput --events 200000 --target 100000
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+import codec
+from components.FrameBuffer import FrameBuffer
+from components.RawInputReceiver import RawInputReceiver
+
+
+def _payload(events):
+    line = json.dumps({
+        "device": {"vid": "046d", "pid": "c077", "product_name": "Logitech USB Receiver"},
+        "event": {"keyname": "kp_1", "action": "press"},
+    }) + "\n"
+    return line.encode() * events
+
+
+def bench_framer(events):
+    blob = memoryview(_payload(events))
+    framer = FrameBuffer()
+    count = 0
+
+    def on_frame(frame):
+        nonlocal count
+        codec.loads(frame)
+        count += 1
+
+    t0 = time.perf_counter()
+    pos = 0
+    while pos < len(blob):
+        dest = framer.get_buffer()
+        n = min(len(dest), len(blob) - pos)
+        dest[:n] = blob[pos:pos + n]
+        framer.commit(n, on_frame)
+        pos += n
+    elapsed = time.perf_counter() - t0
+    return count, elapsed
+
+
+def bench_socket(events):
+    receiver = RawInputReceiver(listen_port=0, discovery_port=0)
+    count = 0
+    done = threading.Event()
+
+    def on_event(event):
+        nonlocal count
+        count += 1
+        if count >= events:
+            done.set()
+
+    receiver.raw_input_signal.connect(on_event)
+    receiver.start()
+
+    blob = _payload(events)
+    client = socket.create_connection(("127.0.0.1", receiver.listen_port))
+    t0 = time.perf_counter()
+    client.sendall(blob)
+    done.wait(timeout=60)
+    elapsed = time.perf_counter() - t0
+    client.close()
+    receiver.stop()
+    return count, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--events", type=int, default=200000)
+    ap.add_argument("--target", type=float, default=100000.0, help="required events/s (exit 1 if missed)")
+    ap.add_argument("--mode", choices=["framer", "socket", "both"], default="both")
+    args = ap.parse_args()
+
+    ok = True
+    for mode, fn in [("framer", bench_framer), ("socket", bench_socket)]:
+        if args.mode not in (mode, "both"):
+            continue
+        count, elapsed = fn(args.events)
+        rate = count / elapsed if elapsed else 0.0
+        passed = count == args.events and rate >= args.target
+        ok = ok and passed
+        print(f"{mode:>7}: {count} events in {elapsed:.3f}s -> {rate:,.0f} events/s "
+              f"[{'PASS' if passed else 'FAIL'} target {args.target:,.0f}]")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
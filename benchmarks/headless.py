@@ -0,0 +1,54 @@
+"""Window stand-in for driving logic.live without a GUI (benchmarks and offline replay)."""
+import json
+
+from components.KeyOutput import RecordingBackend
+from components.LayerStack import LayerStack
+from components.MacroRunner import MacroRunner
+from components.MacroScheduler import MacroScheduler
+from components.TurboEngine import TurboEngine
+from components.VirtualButton import VirtualButton
+import logic.live as live_logic
+
+
+class QueuedSignal:
+    """Stands in for a pyqtSignal; emitted args go to a queue (the "GUI") or nowhere."""
+
+    def __init__(self, gui_queue=None):
+        self.gui_queue = gui_queue
+
+    def emit(self, *args):
+        if self.gui_queue is not None:
+            self.gui_queue.put(args)
+
+
+class HeadlessWindow:
+    """The attributes of MainWindow that logic.live reads and writes."""
+
+    def __init__(self, virtual_buttons=None, macros=None, settings=None, gui_queue=None):
+        self.virtual_buttons = virtual_buttons or []
+        self.macros = macros or {}
+        self.settings = settings or {}
+        self.key_output = RecordingBackend()
+        live_logic.compile_macros(self)
+        self.mapping_key_process = False
+        self.mapping_target = None
+        self.pressed_keys = {}
+        self.layers = LayerStack(self.virtual_buttons, self.settings.get("device_filtering", False))
+        self.macro_scheduler = MacroScheduler(precise=self.settings.get("precise_macro_timing", False))
+        self.macro_runner = MacroRunner(self.macro_scheduler, self.settings.get("max_macro_runs", 32))
+        self.turbo = TurboEngine(self.macro_scheduler, self.settings.get("turbo_overrun", "skip"))
+        self.highlight_signal = QueuedSignal(gui_queue)
+        self.update_info_label = QueuedSignal(gui_queue)
+        self.log_signal = QueuedSignal(gui_queue)
+        self.key_captured_signal = QueuedSignal(gui_queue)
+        self.key_mapped_signal = QueuedSignal(gui_queue)
+        self.layer_changed_signal = QueuedSignal(gui_queue)
+
+    @classmethod
+    def from_files(cls, layout_path, macro_path, settings=None):
+        with open(layout_path, "r") as f:
+            layout = json.load(f)
+        with open(macro_path, "r") as f:
+            macros = json.load(f)
+        buttons = [VirtualButton.from_dict(d) for d in layout.get("virtual_buttons", [])]
+        return cls(buttons, macros, settings)
@@ -0,0 +1,96 @@
+"""
+Connection count vs. per-event latency for RawInputReceiver.
+
+Opens N fake broadcaster connections, sends key events round-robin at a fixed
+total rate and measures send -> raw_input_signal latency.
+
+Run from the repo root:
+    python -m benchmarks.ingest_latency --connections 1 4 16 64 --events 2000
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+
+from components.RawInputReceiver import RawInputReceiver
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _make_event(i, sent):
+    return {
+        "device": {"vid": "046d", "pid": "c077", "product_name": f"Bench Pad {i}"},
+        "event": {"keyname": "kp_1", "action": "press"},
+        "bench_sent": sent,
+    }
+
+
+def run_case(connections, events, rate):
+    receiver = RawInputReceiver(listen_port=0, discovery_port=0)
+    latencies = []
+    done = threading.Event()
+
+    def on_event(event):
+        latencies.append(time.perf_counter() - event["bench_sent"])
+        if len(latencies) >= events:
+            done.set()
+
+    receiver.raw_input_signal.connect(on_event)
+    receiver.start()
+
+    clients = []
+    for _ in range(connections):
+        c = socket.create_connection(("127.0.0.1", receiver.listen_port))
+        c.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        clients.append(c)
+    time.sleep(0.2)  # let the loop accept everything
+
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    for i in range(events):
+        while time.perf_counter() < next_send:
+            pass
+        c = clients[i % connections]
+        c.sendall((json.dumps(_make_event(i % connections, time.perf_counter())) + "\n").encode())
+        next_send += interval
+
+    done.wait(timeout=10)
+    threads = threading.active_count()
+    for c in clients:
+        c.close()
+    receiver.stop()
+
+    latencies.sort()
+    return {
+        "connections": connections,
+        "received": len(latencies),
+        "p50_us": _percentile(latencies, 50) * 1e6,
+        "p95_us": _percentile(latencies, 95) * 1e6,
+        "p99_us": _percentile(latencies, 99) * 1e6,
+        "max_us": (latencies[-1] if latencies else 0.0) * 1e6,
+        "threads": threads,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    ap.add_argument("--events", type=int, default=2000, help="events per case")
+    ap.add_argument("--rate", type=float, default=2000.0, help="total events/s across all connections")
+    args = ap.parse_args()
+
+    print(f"{'conns':>6} {'recv':>6} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9} {'threads':>8}")
+    for n in args.connections:
+        r = run_case(n, args.events, args.rate)
+        print(f"{r['connections']:>6} {r['received']:>6} {r['p50_us']:>9.1f} {r['p95_us']:>9.1f} "
+              f"{r['p99_us']:>9.1f} {r['max_us']:>9.1f} {r['threads']:>8}")
+
+
+if __name__ == "__main__":
+    main()
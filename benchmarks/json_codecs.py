@@ -0,0 +1,96 @@
+"""
+Compare JSON decoders on our real event payloads.
+
+Payloads are the NDJSON event lines broadcasters send (or the events of a
+capture file with --capture), plus data/macros.json and the bundled layouts.
+Every installed backend of codec.py is timed; with msgspec installed the
+typed RawEvent struct decode is timed as well.
+
+Run from the repo root:
+    python -m benchmarks.json_codecs --events 100000
+"""
+import argparse
+import glob
+import json
+import time
+
+import codec
+from constants import CONFIG_FILE, MACRO_FILE
+
+# Typed decode straight into structs (msgspec only); the receiver keeps plain dicts
+if codec.msgspec is not None:
+    msgspec = codec.msgspec
+
+    class DeviceInfo(msgspec.Struct):
+        vid: object = None
+        pid: object = None
+        product_name: str = "Unknown Device"
+
+    class KeyEvent(msgspec.Struct):
+        keyname: str = ""
+        action: object = None
+        timestamp: object = None
+
+    class RawEvent(msgspec.Struct):
+        device: DeviceInfo = msgspec.field(default_factory=DeviceInfo)
+        event: KeyEvent = msgspec.field(default_factory=KeyEvent)
+
+    decode_event_struct = msgspec.json.Decoder(RawEvent).decode
+else:
+    decode_event_struct = None
+
+DEVICES = [{"vid": "046d", "pid": "c52b", "product_name": "Logitech USB Receiver"},
+           {"vid": None, "pid": None, "product_name": "USB-HID Keyboard"}]
+
+
+def event_payloads(events, capture=None):
+    if capture:
+        from components.CaptureFile import CaptureReader
+        payloads = [json.dumps(e).encode() for _, e in CaptureReader(capture)]
+        return (payloads * (events // max(1, len(payloads)) + 1))[:events]
+    return [json.dumps({
+        "device": DEVICES[i % len(DEVICES)],
+        "event": {"keyname": f"kp_{i % 10}", "action": "press" if i % 2 == 0 else "release",
+                  "timestamp": 1760000000.0 + i / 1000.0},
+    }).encode() for i in range(events)]
+
+
+def time_decode(decode, payloads, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for p in payloads:
+            decode(p)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(payloads) * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--events", type=int, default=100000)
+    ap.add_argument("--capture", help="use the events of a capture file as payloads")
+    args = ap.parse_args()
+
+    events = event_payloads(args.events, args.capture)
+    views = [memoryview(bytearray(p)) for p in events]  # What FrameBuffer hands the decoder
+    files = [open(MACRO_FILE, "rb").read()] + [open(p, "rb").read() for p in glob.glob(str(CONFIG_FILE / "*.json"))]
+
+    default = codec.BACKEND
+    print(f"{'backend':<16} {'event ns':>10} {'view ns':>10} {'files us':>10}")
+    for name in codec.AVAILABLE_BACKENDS:
+        codec.use_backend(name)
+        ev = time_decode(codec.loads, events)
+        mv = time_decode(codec.loads, views)
+        fl = time_decode(codec.loads, files * 200) / 1e3
+        print(f"{name:<16} {ev:>10.0f} {mv:>10.0f} {fl:>10.1f}")
+    codec.use_backend(default)
+
+    if decode_event_struct is not None:
+        ev = time_decode(decode_event_struct, events)
+        mv = time_decode(decode_event_struct, views)
+        print(f"{'msgspec (typed)':<16} {ev:>10.0f} {mv:>10.0f} {'-':>10}")
+    print(f"default backend: {default}")
+
+
+if __name__ == "__main__":
+    main()
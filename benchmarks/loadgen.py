@@ -0,0 +1,272 @@
+"""
+Synthetic broadcaster fleet: impersonates N Raspberry Pi broadcasters.
+
+Each broadcaster does its own discovery handshake (UDP discovery_request ->
+discovery_response, retried while the host rate-limits the shared source
+address), then connects to the host and streams a configurable
+press/release/move mix at a target rate, over NDJSON, the binary protocol or
+UDP datagrams. Events carry a wall-clock timestamp.
+
+Against a running app (--host) only the send side is measured: events sent
+and the rate achieved. Receiver-side numbers (events delivered, queue drops
+and coalescing, send -> dispatch latency) need --in-process, which starts a
+RawInputReceiver in this process and streams to it over loopback.
+
+Run from the repo root:
+    python -m benchmarks.loadgen --in-process --broadcasters 12 --rate 200 --duration 5
+    python -m benchmarks.loadgen --host 192.168.1.20 --broadcasters 4 --protocol binary
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+
+from components.LatencyHistogram import LatencyHistogram
+from components.WireProtocol import BinaryEncoder, HELLO
+
+KEYS = ["kp_0", "kp_1", "kp_2", "kp_3", "kp_4", "kp_5", "kp_6", "kp_7", "kp_8", "kp_9",
+        "kp_plus", "kp_minus", "kp_multiply", "kp_divide", "kp_enter", "kp_dot", "numlock", "backspace"]
+PRODUCTS = [("046d", "c52b", "Logitech USB Receiver"), ("04d9", "1203", "USB-HID Keyboard"),
+            ("1a2c", "0e24", "USB Numeric Keypad"), ("05ac", "024f", "Apple Keyboard")]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    if "press" in mix or "release" in mix:
+        # Releases always follow their press, so they share one weight
+        mix["press"] = mix.get("press", 0) + mix.pop("release", 0)
+    return mix
+
+
+class _DiscoveryClient(asyncio.DatagramProtocol):
+    """Waits for the host's discovery_response; resolves .reply with its ip_address."""
+
+    def __init__(self):
+        self.reply = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        try:
+            reply = json.loads(data)
+        except ValueError:
+            return
+        if isinstance(reply, dict) and reply.get("type") == "discovery_response" and not self.reply.done():
+            self.reply.set_result(reply["ip_address"])
+
+
+class Broadcaster:
+    def __init__(self, index, args):
+        vid, pid, name = PRODUCTS[index % len(PRODUCTS)]
+        self.device = {"vid": vid, "pid": pid, "product_name": f"{name} #{index}"}
+        self.args = args
+        self.rng = random.Random(args.seed + index)
+        self.mix = parse_mix(args.mix)
+        self.sent = 0
+        self.seq = 0
+        self.encoder = BinaryEncoder()
+        self.device_id = None
+        self.discovery_requests = 0
+
+    def next_events(self):
+        action = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        now = time.time()
+        if action == "press":
+            key = self.rng.choice(KEYS)
+            return [("press", key, now), ("release", key, now)]
+        return [(action, "mouse", now)]
+
+    def encode(self, events):
+        if self.args.protocol == "binary":
+            out = bytearray()
+            for action, key, ts in events:
+                code, decl = self.encoder.key(key)
+                out += decl
+                out += self.encoder.event(self.device_id, code, action, ts)
+            return bytes(out)
+
+        records = []
+        for action, key, ts in events:
+            event = {"keyname": key, "action": action, "timestamp": ts}
+            if action == "move":
+                event.update(rel_x=self.rng.randint(-5, 5), rel_y=self.rng.randint(-5, 5))
+            records.append(event)
+
+        if self.args.protocol == "udp":
+            msg = {"device": self.device, "seq": self.seq, "events": records}
+            self.seq += len(records)
+            return json.dumps(msg).encode()
+        return "".join(json.dumps({"device": self.device, "event": e}) + "\n" for e in records).encode()
+
+    async def discover(self, host, port, timeout, retry=0.5):
+        """The broadcaster side of the discovery handshake; returns the host's ip_address."""
+        loop = asyncio.get_running_loop()
+        transport, client = await loop.create_datagram_endpoint(
+            _DiscoveryClient, local_addr=("0.0.0.0", 0), allow_broadcast=True)
+        request = json.dumps({"type": "discovery_request"}).encode()
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                transport.sendto(request, (host, port))
+                self.discovery_requests += 1
+                wait = min(retry, deadline - loop.time())
+                if wait <= 0:
+                    raise RuntimeError(f"No discovery response from {host}:{port} within {timeout:g}s")
+                try:
+                    return await asyncio.wait_for(asyncio.shield(client.reply), wait)
+                except asyncio.TimeoutError:
+                    pass  # Lost, or rate-limited by the host: ask again
+        finally:
+            transport.close()
+
+    async def run(self, host, port, stop_at):
+        loop = asyncio.get_running_loop()
+        if self.args.protocol == "udp":
+            transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+            write = transport.sendto
+            writer = None
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            write = writer.write
+            if self.args.protocol == "binary":
+                writer.write(self.encoder.hello() + self.encoder.device(1, self.device))
+                await reader.readexactly(HELLO.size)
+                _, self.device_id = self.encoder.read_device_ack(await reader.readexactly(5))
+
+        interval = 1.0 / self.args.rate
+        next_send = time.perf_counter() + self.rng.random() * interval  # Spread broadcasters out
+        while time.perf_counter() < stop_at:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Catch up in one write if we fell behind the schedule
+            events = []
+            while next_send <= time.perf_counter():
+                batch = self.next_events()
+                events.extend(batch)
+                next_send += interval * len(batch)
+            if not events:
+                continue
+            if self.args.protocol == "udp" and len(events) > 8:
+                for i in range(0, len(events), 8):
+                    write(self.encode(events[i:i + 8]))
+            else:
+                write(self.encode(events))
+            self.sent += len(events)
+            if writer is not None:
+                await writer.drain()
+
+        if writer is not None:
+            writer.close()
+            await writer.wait_closed()
+        else:
+            transport.close()
+
+
+class InProcessHost:
+    """RawInputReceiver plus a dispatch handler that counts and times what comes out."""
+
+    def __init__(self, args):
+        from components.RawInputReceiver import RawInputReceiver
+        self.receiver = RawInputReceiver(listen_port=0, discovery_port=0, udp_events=args.protocol == "udp",
+                                         stats_interval=0)
+        self.latency = LatencyHistogram("send->dispatch")
+        self.received = 0
+        self.lock = threading.Lock()
+        self.receiver.set_dispatch_handler(self.on_batch)
+        self.receiver.start()
+
+    def on_batch(self, events):
+        now = time.time()
+        with self.lock:
+            self.received += len(events)
+            for event in events:
+                ts = event.get("event", {}).get("timestamp")
+                if ts:
+                    self.latency.record(now - ts)
+
+    def stop(self):
+        self.receiver.stop()
+
+
+async def run_fleet(args, port, discovery_host, discovery_port, connect_host=None):
+    """
+    Every broadcaster discovers the host, then all of them stream together.
+    connect_host overrides the discovered address (in-process runs use loopback).
+    """
+    fleet = [Broadcaster(i, args) for i in range(args.broadcasters)]
+    t0 = time.perf_counter()
+    hosts = await asyncio.gather(*(b.discover(discovery_host, discovery_port, args.discovery_timeout)
+                                   for b in fleet))
+    requests = sum(b.discovery_requests for b in fleet)
+    print(f"discovery {len(fleet)} broadcasters found {', '.join(sorted(set(hosts)))} in "
+          f"{time.perf_counter() - t0:.2f}s ({requests} requests)")
+    print(f"streaming {args.protocol} from {args.broadcasters} broadcasters "
+          f"at {args.rate:g} ev/s each for {args.duration:g}s")
+
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    await asyncio.gather(*(b.run(connect_host or host, port, stop_at) for b, host in zip(fleet, hosts)))
+    return fleet, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--broadcasters", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=100.0, help="events/s per broadcaster")
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--mix", default="press=0.8,move=0.2", help="weights of press (+release), move, hold")
+    ap.add_argument("--protocol", choices=["ndjson", "binary", "udp"], default="ndjson")
+    ap.add_argument("--host", default="255.255.255.255", help="where discovery requests go")
+    ap.add_argument("--port", type=int, default=5005)
+    ap.add_argument("--discovery-port", type=int, default=5006)
+    ap.add_argument("--discovery-timeout", type=float, default=30.0, help="per broadcaster, retries included")
+    ap.add_argument("--in-process", action="store_true", help="start a RawInputReceiver in this process")
+    ap.add_argument("--min-rate", type=float, default=0.0, help="exit 1 if the delivered rate is lower")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    local = None
+    port, discovery_port, discovery_host = args.port, args.discovery_port, args.host
+    if args.in_process:
+        local = InProcessHost(args)
+        port, discovery_port, discovery_host = local.receiver.listen_port, local.receiver.discovery_port, "127.0.0.1"
+
+    # The advertised LAN address may not accept loopback test traffic
+    connect_host = "127.0.0.1" if args.in_process else None
+    fleet, elapsed = asyncio.run(run_fleet(args, port, discovery_host, discovery_port, connect_host))
+    sent = sum(b.sent for b in fleet)
+    print(f"sent      {sent} events, {sent / elapsed:,.0f} events/s achieved "
+          f"(target {args.rate * args.broadcasters:,.0f})")
+
+    delivered_rate = sent / elapsed
+    if local is not None:
+        time.sleep(0.5)  # Let the tail of the stream drain
+        q = local.receiver.queue_stats()
+        received = local.received
+        local.stop()
+        delivered_rate = received / elapsed
+        print(f"received  {received} events ({received / elapsed:,.0f} events/s)")
+        print(f"queue     coalesced {q['coalesced']}, dropped {q['dropped']}, max depth {q['max_depth']}")
+        print(f"missing   {sent - received - q['coalesced'] - q['dropped']} "
+              f"(sent - received - coalesced - dropped)")
+        if args.protocol == "udp":
+            lost = sum(s["lost"] for s in local.receiver.udp_stats())
+            print(f"udp       lost {lost}")
+        d = local.latency.to_dict()
+        print(f"latency   p50 {d['p50'] * 1e3:.3f} ms, p95 {d['p95'] * 1e3:.3f} ms, "
+              f"p99 {d['p99'] * 1e3:.3f} ms, max {d['max'] * 1e3:.3f} ms")
+
+    if args.min_rate and delivered_rate < args.min_rate:
+        print(f"FAIL: {delivered_rate:,.0f} events/s below --min-rate {args.min_rate:,.0f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
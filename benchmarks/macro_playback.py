@@ -0,0 +1,192 @@
+"""
+Macro playback fidelity and throughput against the recording output backend.
+
+Scenarios:
+    recorded    every macro in --macros, played --repeat times one after another
+    long        one synthetic macro of --steps key presses, --gap-ms apart
+    concurrent  --concurrent synthetic macros of --concurrent-steps presses, all at once
+
+Each key batch the backend receives is compared with when the timeline says it
+is due (run_macro call + step offset). Reports the timing error distribution,
+the scheduler's own lateness histogram, CPU use and thread counts, and with
+--json writes everything to a file for comparing runs across versions.
+
+Run from the repo root:
+    python -m benchmarks.macro_playback --json results/macro_playback.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+import codec
+import logic.live as live_logic
+from benchmarks.headless import HeadlessWindow
+from constants import MACRO_FILE
+
+
+def _synthetic(name, key, steps, gap):
+    return {"name": name, "steps": [{"key": key, "delay": i * gap, "duration": gap / 2} for i in range(steps)]}
+
+
+def _os_threads():
+    # Linux only; includes threads that threading doesn't know about
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _pick(values, pct):
+    return values[min(len(values) - 1, int(pct / 100.0 * len(values)))] if values else 0.0
+
+
+def play(window, macro_ids, concurrent):
+    """
+    Plays macro_ids (all at once if concurrent, else one at a time) and returns
+    [(expected times, received times), ...] per run plus the resource samples.
+    Concurrent runs must use disjoint keys so batches can be told apart.
+    """
+    backend = window.key_output
+    scheduler = window.macro_scheduler
+    backend.clear()
+    scheduler.lateness.reset()
+    peak_threads = threading.active_count()
+    peak_os_threads = _os_threads()
+    starts = []
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    groups = [macro_ids] if concurrent else [[macro_id] for macro_id in macro_ids]
+    for group in groups:
+        run_ids = []
+        for macro_id in group:
+            starts.append((macro_id, time.perf_counter()))
+            run_ids.append(live_logic.run_macro(window, macro_id))
+        while any(scheduler.is_active(run_id) for run_id in run_ids):
+            time.sleep(0.01)
+            peak_threads = max(peak_threads, threading.active_count())
+            os_threads = _os_threads()
+            if os_threads is not None:
+                peak_os_threads = max(peak_os_threads, os_threads)
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+
+    received = backend.batches
+    runs = []
+    for macro_id, start in starts:
+        timeline = window.macro_timelines[macro_id][0]
+        keys = set(timeline.keys)
+        expected = [start + offset for offset in timeline.offsets]
+        # Sequential runs share keys but not time: everything before start was an earlier run
+        got = [t for t, batch in received if t >= start and batch[0][1] in keys]
+        runs.append((expected, got[:len(expected)]))
+    samples = {"wall_s": wall, "cpu_s": cpu, "peak_threads": peak_threads, "peak_os_threads": peak_os_threads}
+    return runs, samples
+
+
+def summarize(runs, samples, scheduler):
+    errors = []
+    missing = 0
+    for expected, got in runs:
+        missing += len(expected) - len(got)
+        errors.extend(g - e for e, g in zip(expected, got))
+    errors.sort()
+    ms = lambda v: round(v * 1e3, 4)
+    lateness = scheduler.lateness.to_dict()
+    return {
+        "runs": len(runs),
+        "steps": len(errors),
+        "missing_steps": missing,
+        "error_ms": {
+            "mean": ms(sum(errors) / len(errors)) if errors else 0.0,
+            "p50": ms(_pick(errors, 50)),
+            "p95": ms(_pick(errors, 95)),
+            "p99": ms(_pick(errors, 99)),
+            "max": ms(errors[-1]) if errors else 0.0,
+        },
+        "scheduler_lateness_ms": {k: ms(lateness[k]) for k in ("mean", "p50", "p95", "p99", "max")},
+        "steps_per_s": round(len(errors) / samples["wall_s"], 1) if samples["wall_s"] else 0.0,
+        "wall_s": round(samples["wall_s"], 3),
+        "cpu_s": round(samples["cpu_s"], 3),
+        "cpu_pct": round(100.0 * samples["cpu_s"] / samples["wall_s"], 1) if samples["wall_s"] else 0.0,
+        "peak_threads": samples["peak_threads"],
+        "peak_os_threads": samples["peak_os_threads"],
+        "max_heap_depth": scheduler.max_depth,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--macros", default=str(MACRO_FILE))
+    ap.add_argument("--repeat", type=int, default=5, help="plays of each recorded macro")
+    ap.add_argument("--steps", type=int, default=5000, help="key presses in the long macro")
+    ap.add_argument("--gap-ms", type=float, default=1.0)
+    ap.add_argument("--concurrent", type=int, default=50)
+    ap.add_argument("--concurrent-steps", type=int, default=200)
+    ap.add_argument("--no-precise", action="store_true", help="plain sleeps instead of sleep+spin timing")
+    ap.add_argument("--json", metavar="PATH", help="write the results here")
+    args = ap.parse_args()
+
+    with open(args.macros, "r") as f:
+        recorded = json.load(f)
+    gap = args.gap_ms / 1000.0
+    macros = dict(recorded)
+    macros["bench_long"] = _synthetic("Long", "bench_long", args.steps, gap)
+    stress = [f"bench_stress_{i}" for i in range(args.concurrent)]
+    for macro_id in stress:
+        macros[macro_id] = _synthetic(macro_id, macro_id, args.concurrent_steps, gap)
+
+    window = HeadlessWindow([], macros, {"precise_macro_timing": not args.no_precise})
+    window.macro_scheduler.start()
+    time.sleep(0.1)  # Let the scheduler thread calibrate
+
+    scenarios = {
+        "recorded": ([m for m in recorded for _ in range(args.repeat)], False),
+        "long": (["bench_long"], False),
+        "concurrent": (stress, True),
+    }
+    results = {}
+    print(f"{'scenario':>10} {'runs':>5} {'steps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'steps/s':>9} {'cpu %':>6} {'threads':>7}")
+    for name, (macro_ids, concurrent) in scenarios.items():
+        window.macro_scheduler.max_depth = 0
+        runs, samples = play(window, macro_ids, concurrent)
+        result = results[name] = summarize(runs, samples, window.macro_scheduler)
+        err = result["error_ms"]
+        print(f"{name:>10} {result['runs']:>5} {result['steps']:>7} {err['p50']:>8.3f} {err['p95']:>8.3f} "
+              f"{err['p99']:>8.3f} {err['max']:>8.3f} {result['steps_per_s']:>9.0f} {result['cpu_pct']:>6.1f} "
+              f"{result['peak_threads']:>7}")
+        if result["missing_steps"]:
+            print(f"{'':>10} {result['missing_steps']} steps never reached the backend")
+    window.macro_scheduler.stop()
+
+    if args.json:
+        report = {
+            "benchmark": "macro_playback",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "json_backend": codec.BACKEND,
+            "precise": window.macro_scheduler.precise,
+            "spin_margin_ms": round(window.macro_scheduler.spin_margin * 1e3, 4),
+            "args": vars(args),
+            "scenarios": results,
+        }
+        directory = os.path.dirname(args.json)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Replay a raw input capture through live.on_raw_input_batch without any hardware.
+
+Captures are written by RawInputReceiver.start_recording() (Advanced > Record
+Input Capture). --speed 1 replays in real time, 0 as fast as possible.
+--dry-run counts macro triggers instead of injecting keys.
+
+Run from the repo root:
+    python -m benchmarks.replay_capture data/captures/capture.npcap \\
+        --layout data/layouts/test_layout.json --speed 0 --dry-run
+"""
+import argparse
+
+import logic.live as live_logic
+import logic.replay as replay_logic
+from benchmarks.headless import HeadlessWindow
+from components.LatencyHistogram import PIPELINE
+from constants import MACRO_FILE
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("capture")
+    ap.add_argument("--layout", required=True)
+    ap.add_argument("--macros", default=str(MACRO_FILE))
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--device-filtering", action="store_true")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    window = HeadlessWindow.from_files(args.layout, args.macros, {"device_filtering": args.device_filtering})
+
+    triggers = 0
+    if args.dry_run:
+        def count_trigger(parent, macro_id, *stamps):
+            nonlocal triggers
+            triggers += 1
+        live_logic.run_macro = count_trigger
+
+    PIPELINE.reset()
+    count, elapsed = replay_logic.replay_capture(window, args.capture, speed=args.speed)
+    print(f"Replayed {count} events in {elapsed:.3f}s ({count / elapsed if elapsed else 0:,.0f} events/s)")
+    if args.dry_run:
+        print(f"Macro triggers: {triggers}")
+    print(PIPELINE.dump())
+
+
+if __name__ == "__main__":
+    main()
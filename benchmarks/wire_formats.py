@@ -0,0 +1,86 @@
+"""
+NDJSON vs. binary wire format: bytes per event and decode cost per event.
+
+Both formats are decoded the way RawInputReceiver does it (FrameBuffer + codec.loads
+for NDJSON, BinaryDecoder for binary) into the same event dict shape.
+
+Run from the repo root:
+    python -m benchmarks.wire_formats --events 200000
+"""
+import argparse
+import json
+import time
+
+import codec
+from components.DeviceRegistry import DeviceRegistry
+from components.FrameBuffer import FrameBuffer
+from components.WireProtocol import BinaryDecoder, BinaryEncoder
+
+DEVICE = {"vid": "046d", "pid": "c077", "product_name": "Logitech USB Receiver"}
+KEYS = ["kp_1", "kp_2", "kp_3", "enter", "kp_plus"]
+
+
+def ndjson_stream(events):
+    out = bytearray()
+    for i in range(events):
+        out += (json.dumps({
+            "device": DEVICE,
+            "event": {"keyname": KEYS[i % len(KEYS)], "action": "press" if i % 2 == 0 else "release",
+                      "timestamp": 1700000000.0 + i / 1000.0},
+        }) + "\n").encode()
+    return bytes(out), 0
+
+
+def binary_stream(events):
+    enc = BinaryEncoder()
+    out = bytearray(enc.hello())
+    out += enc.device(1, DEVICE)
+    setup = len(out)
+    for i in range(events):
+        code, decl = enc.key(KEYS[i % len(KEYS)])
+        out += decl
+        out += enc.event(0, code, "press" if i % 2 == 0 else "release", 1700000000.0 + i / 1000.0)
+    return bytes(out), setup
+
+
+def feed(data, commit):
+    framer = FrameBuffer()
+    view = memoryview(data)
+    pos = 0
+    t0 = time.perf_counter()
+    while pos < len(view):
+        dest = framer.get_buffer()
+        n = min(len(dest), len(view) - pos)
+        dest[:n] = view[pos:pos + n]
+        commit(framer, n)
+        pos += n
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--events", type=int, default=200000)
+    args = ap.parse_args()
+
+    results = {}
+
+    data, setup = ndjson_stream(args.events)
+    received = []
+    on_frame = lambda frame: received.append(codec.loads(frame))
+    elapsed = feed(data, lambda framer, n: framer.commit(n, on_frame))
+    results["ndjson"] = (len(data) - setup, elapsed, len(received))
+
+    data, setup = binary_stream(args.events)
+    received = []
+    decoder = BinaryDecoder(DeviceRegistry(), lambda reply: None, received.append)
+    elapsed = feed(data, lambda framer, n: framer.commit_records(n, decoder.parse))
+    results["binary"] = (len(data) - setup, elapsed, len(received))
+
+    print(f"{'format':>7} {'events':>8} {'bytes/event':>12} {'ns/event':>9} {'events/s':>12}")
+    for name, (nbytes, elapsed, count) in results.items():
+        print(f"{name:>7} {count:>8} {nbytes / args.events:>12.1f} {elapsed / count * 1e9:>9.0f} "
+              f"{count / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# codec.py
+"""
+JSON codec shared by the receiver, layouts, macros and settings.
+
+Uses orjson or msgspec when installed and falls back to the stdlib json
+module otherwise. loads() accepts str, bytes, bytearray or memoryview (so
+the receiver can decode frames in place); dumps() returns bytes.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+AVAILABLE_BACKENDS = ["json"] + [name for name, mod in (("msgspec", msgspec), ("orjson", orjson)) if mod]
+
+BACKEND = None
+DecodeError = (ValueError, UnicodeDecodeError)  # Widened for msgspec below
+
+
+def _json_loads(data):
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_dumps_pretty(obj):
+    return json.dumps(obj, indent=2)
+
+
+def _orjson_dumps_pretty(obj):
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def _msgspec_dumps_pretty(obj):
+    return msgspec.json.format(msgspec.json.encode(obj), indent=2).decode()
+
+
+def use_backend(name):
+    """Switch the module-level loads/dumps/dumps_pretty to the named backend."""
+    global BACKEND, loads, dumps, dumps_pretty, DecodeError
+    if name not in AVAILABLE_BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available (have {AVAILABLE_BACKENDS})")
+
+    if name == "orjson":
+        loads, dumps, dumps_pretty = orjson.loads, orjson.dumps, _orjson_dumps_pretty
+    elif name == "msgspec":
+        loads, dumps, dumps_pretty = msgspec.json.Decoder().decode, msgspec.json.Encoder().encode, _msgspec_dumps_pretty
+    else:
+        loads, dumps, dumps_pretty = _json_loads, _json_dumps, _json_dumps_pretty
+
+    DecodeError = (ValueError, UnicodeDecodeError) + ((msgspec.DecodeError,) if msgspec else ())
+    BACKEND = name
+
+
+def load_file(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path):
+    """Pretty-printed (2-space indent) like the files the app has always written."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps_pretty(obj))
+
+
+# Fastest available wins: orjson, then msgspec, then stdlib
+use_backend("orjson" if orjson else "msgspec" if msgspec else "json")
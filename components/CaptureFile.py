@@ -0,0 +1,59 @@
+import struct
+import time
+
+import codec
+
+MAGIC = b"NPCAP1\n"
+HEADER = struct.Struct("<dd")  # Wall clock and perf_counter() when the capture started
+RECORD = struct.Struct("<dI")  # Receive offset in seconds, payload length
+
+
+class CaptureWriter:
+    """
+    Append-only capture of raw input events. Each record is the receive time
+    (seconds since the capture started) and the event as JSON; records are
+    streamed to disk through a buffered file, never held in memory.
+    """
+    def __init__(self, path, buffer_size=64 * 1024):
+        self.path = path
+        self.started_wall = time.time()
+        self.started = time.perf_counter()
+        self.events = 0
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(MAGIC + HEADER.pack(self.started_wall, self.started))
+
+    def write(self, event, received=None):
+        """received: perf_counter() stamp of the socket read (defaults to now)."""
+        offset = (time.perf_counter() if received is None else received) - self.started
+        payload = codec.dumps({k: v for k, v in event.items() if not k.startswith("_")})  # Drop pipeline stamps
+        self._file.write(RECORD.pack(offset, len(payload)) + payload)
+        self.events += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CaptureReader:
+    """Iterates (offset_seconds, event) records of a capture file in order."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            head = f.read(len(MAGIC) + HEADER.size)
+        if not head.startswith(MAGIC) or len(head) < len(MAGIC) + HEADER.size:
+            raise ValueError(f"{path} is not a capture file")
+        self.started_wall, self.started = HEADER.unpack_from(head, len(MAGIC))
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            f.seek(len(MAGIC) + HEADER.size)
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return  # End of file (or a record cut off by a crash)
+                offset, length = RECORD.unpack(head)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return
+                yield offset, codec.loads(payload)
@@ -0,0 +1,320 @@
+import threading
+
+from components.LatencyHistogram import LatencyHistogram, PIPELINE
+
+CHORD_WINDOW_MS = 50  # All keys of a chord must go down within this of the first
+SEQUENCE_WINDOW_MS = 600  # Max gap between consecutive keys of a sequence
+MAX_CHORD_KEYS = 6
+
+INFINITY = float("inf")
+
+
+class _Node:
+    """Sequence trie node. window is the time allowed until the next key."""
+    __slots__ = ("children", "buttons", "window")
+
+    def __init__(self):
+        self.children = {}
+        self.buttons = ()
+        self.window = 0.0
+
+
+class _Table:
+    """
+    Compiled triggers for one device slot.
+    starters: keys that can begin a chord or sequence (everything else passes straight through)
+    chords:   frozenset of keys -> [buttons completed here, can still grow, window]
+    root:     sequence trie
+    """
+    __slots__ = ("starters", "chords", "root")
+
+    def __init__(self):
+        self.starters = set()
+        self.chords = {}
+        self.root = _Node()
+
+
+class _Pending:
+    """Keys held back on one device while a chord/sequence is undecided."""
+    __slots__ = ("table", "started", "entries", "chord", "chord_deadline", "node", "seq_deadline", "match")
+
+    def __init__(self, table, now):
+        self.table = table
+        self.started = now
+        self.entries = []  # (key, action, event) in arrival order
+        self.chord = frozenset()  # None once no chord can match any more
+        self.chord_deadline = INFINITY
+        self.node = table.root  # None once no sequence can match any more
+        self.seq_deadline = INFINITY
+        self.match = None  # (name, buttons, entries consumed) of the longest complete trigger
+
+    def deadline(self):
+        return min(self.chord_deadline if self.chord is not None else INFINITY,
+                   self.seq_deadline if self.node is not None else INFINITY)
+
+
+class _Held:
+    """A fired trigger whose keys are still down; released when the last one goes up."""
+    __slots__ = ("name", "buttons", "keys")
+
+    def __init__(self, name, buttons, keys):
+        self.name = name
+        self.buttons = buttons
+        self.keys = keys
+
+
+class ChordEngine:
+    """
+    Resolves chord (keys pressed together) and sequence (keys pressed in order)
+    triggers of virtual buttons.
+
+    Triggers are compiled into a table per device slot (the device path with
+    filtering on, None otherwise): every subset of a chord maps to whether it
+    completes and/or can still grow, and sequences form a trie. Presses of keys
+    that can't begin a trigger pass straight through with no added delay; the
+    rest are held until a trigger fires, the window runs out or no trigger can
+    match, in which case they are released in order as ordinary key events.
+
+    feed() and expire() return outcomes for the caller to act on:
+        ("pass", device, key, action, event)   dispatch as an ordinary event
+        ("fire", device, name, buttons, event) trigger pressed (event = its first key)
+        ("release", device, name, buttons)     all keys of the trigger released
+
+    Compiled on the GUI thread and swapped in whole; feed/expire/next_timeout
+    run on the dispatch thread only.
+    """
+
+    def __init__(self, virtual_buttons=(), device_filtering=False):
+        self._lock = threading.Lock()
+        self._buttons = []
+        self._tables = {}
+        self._pending = {}  # device path -> _Pending
+        self._held = {}  # (device path, key) -> _Held
+        self.device_filtering = device_filtering
+        self.decision_latency = LatencyHistogram("chord")
+        self.fired = 0
+        self.flushed = 0
+        self.rebuild(virtual_buttons, device_filtering)
+
+    # === Compilation (GUI thread) ===
+    def rebuild(self, virtual_buttons, device_filtering=None):
+        with self._lock:
+            if device_filtering is not None:
+                self.device_filtering = bool(device_filtering)
+            self._buttons = [vb for vb in virtual_buttons if vb.trigger_keys]
+            self._compile()
+
+    def update(self, vb):
+        with self._lock:
+            self._buttons = [b for b in self._buttons if b is not vb]
+            if vb.trigger_keys:
+                self._buttons.append(vb)
+            self._compile()
+
+    def remove(self, vb):
+        with self._lock:
+            self._buttons = [b for b in self._buttons if b is not vb]
+            self._compile()
+
+    def _compile(self):
+        tables = {}
+        for vb in self._buttons:
+            keys = [k.lower() for k in vb.trigger_keys]
+            if len(keys) < 2:
+                continue  # A single key is an ordinary mapping
+            if self.device_filtering:
+                if not vb.device_path:
+                    continue
+                slot = vb.device_path
+            else:
+                slot = None
+            table = tables.get(slot)
+            if table is None:
+                table = tables[slot] = _Table()
+            table.starters.add(keys[0])
+
+            if vb.trigger_mode == "sequence":
+                window = (vb.trigger_window_ms or SEQUENCE_WINDOW_MS) / 1000.0
+                node = table.root
+                for key in keys:
+                    node.window = max(node.window, window)
+                    node = node.children.setdefault(key, _Node())
+                node.buttons += (vb,)
+                continue
+
+            keys = frozenset(keys)
+            if len(keys) > MAX_CHORD_KEYS:
+                print(f"[ChordEngine] Skipping chord of {len(keys)} keys on '{vb.name}' (max {MAX_CHORD_KEYS})")
+                continue
+            table.starters.update(keys)
+            window = (vb.trigger_window_ms or CHORD_WINDOW_MS) / 1000.0
+            ordered = sorted(keys)
+            for mask in range(1, 1 << len(ordered)):
+                subset = frozenset(k for i, k in enumerate(ordered) if mask >> i & 1)
+                state = table.chords.get(subset)
+                if state is None:
+                    state = table.chords[subset] = [(), False, 0.0]
+                state[2] = max(state[2], window)
+                if subset == keys:
+                    state[0] += (vb,)
+                else:
+                    state[1] = True
+        self._tables = tables
+
+    @property
+    def active(self):
+        return bool(self._tables)
+
+    # === Resolution (dispatch thread) ===
+    def feed(self, device, key, action, event, now):
+        """Process one key event from device at perf_counter() time now."""
+        out = []
+        if self._held:
+            held = self._held.get((device, key))
+            if held is not None:
+                if action == "release":
+                    del self._held[(device, key)]
+                    held.keys.discard(key)
+                    if not held.keys:
+                        out.append(("release", device, held.name, held.buttons))
+                return out  # Repeats of a key that belongs to a fired trigger are swallowed
+
+        st = self._pending.get(device) if self._pending else None
+        if st is not None and now >= st.deadline():
+            self._expire_paths(st, now)
+            self._decide(device, st, now, out)
+            st = self._pending.get(device)
+
+        if st is None:
+            if action != "press":
+                out.append(("pass", device, key, action, event))
+                return out
+            table = self._tables.get(device if self.device_filtering else None)
+            if table is None or key not in table.starters:
+                out.append(("pass", device, key, action, event))
+                return out
+            st = self._pending[device] = _Pending(table, now)
+
+        if action == "press":
+            st.entries.append((key, action, event))
+            self._advance(st, key, now)
+        elif any(k == key and a == "press" for k, a, _ in st.entries):
+            st.entries.append((key, action, event))
+            if action == "release":
+                st.chord = None  # Chord keys must all be down together
+        else:
+            out.append(("pass", device, key, action, event))
+            return out
+        self._decide(device, st, now, out)
+        return out
+
+    def _advance(self, st, key, now):
+        table = st.table
+        if st.node is not None:
+            node = st.node.children.get(key)
+            st.node = node
+            if node is not None:
+                st.seq_deadline = now + node.window
+                if node.buttons:
+                    st.match = (">".join(k for k, a, _ in st.entries if a == "press"), node.buttons, len(st.entries))
+
+        if st.chord is not None:
+            keys = st.chord | {key}
+            state = table.chords.get(keys) if key not in st.chord else None
+            if state is None:
+                st.chord = None
+            else:
+                if not st.chord:
+                    st.chord_deadline = now + state[2]
+                st.chord = keys
+                if state[0]:
+                    st.match = ("+".join(sorted(keys)), state[0], len(st.entries))
+
+    def _expire_paths(self, st, now):
+        if st.chord is not None and now >= st.chord_deadline:
+            st.chord = None
+        if st.node is not None and now >= st.seq_deadline:
+            st.node = None
+
+    def _decide(self, device, st, now, out):
+        """Resolve st once neither a chord nor a sequence can still grow."""
+        if st.chord and st.table.chords[st.chord][1]:
+            return
+        if st.node is not None and st.node.children:
+            return
+        del self._pending[device]
+
+        latency = now - st.started
+        self.decision_latency.record(latency)
+        PIPELINE.record("chord", latency)
+
+        if st.match is None:
+            self.flushed += 1
+            out.extend(("pass", device, key, action, event) for key, action, event in st.entries)
+            return
+
+        self.fired += 1
+        name, buttons, consumed = st.match
+        held = set()
+        for key, action, _ in st.entries[:consumed]:
+            if action == "press":
+                held.add(key)
+            elif action == "release":
+                held.discard(key)
+        out.append(("fire", device, name, buttons, st.entries[0][2]))
+        if held:
+            trigger = _Held(name, buttons, held)
+            for key in held:
+                self._held[(device, key)] = trigger
+        else:
+            out.append(("release", device, name, buttons))
+
+        for key, action, event in st.entries[consumed:]:
+            out.extend(self.feed(device, key, action, event, now))
+
+    def expire(self, now):
+        """Resolve every pending device whose window has run out."""
+        out = []
+        for device, st in list(self._pending.items()):
+            if now >= st.deadline():
+                self._expire_paths(st, now)
+                self._decide(device, st, now, out)
+        return out
+
+    def flush(self, now):
+        """Resolve every pending device now, as if its windows had closed."""
+        out = []
+        for device, st in list(self._pending.items()):
+            st.chord = st.node = None
+            self._decide(device, st, now, out)
+        return out
+
+    def hand_over(self, other):
+        """Move fired-but-still-held triggers to other, so their releases are seen there."""
+        if other is not self:
+            other._held.update(self._held)
+            self._held.clear()
+
+    def next_timeout(self, now):
+        """Seconds until the next window closes, or None when nothing is held back."""
+        if not self._pending:
+            return None
+        return max(0.0, min(st.deadline() for st in self._pending.values()) - now)
+
+    @property
+    def pending(self):
+        return bool(self._pending)
+
+    @property
+    def holding(self):
+        """Fired triggers whose keys are still down (possibly handed over from another layer)."""
+        return bool(self._held)
+
+    def stats(self):
+        return {
+            "triggers": len(self._buttons),
+            "fired": self.fired,
+            "flushed": self.flushed,
+            "pending": len(self._pending),
+            "decision_latency": self.decision_latency.to_dict(),
+        }
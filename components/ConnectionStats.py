@@ -0,0 +1,79 @@
+import time
+
+
+class ConnectionStats:
+    """
+    Cheap counters for one broadcaster connection. Event rates are kept in
+    one-second buckets so rolling 1 s / 10 s / 60 s rates cost a short sum.
+    """
+    WINDOW = 61  # One-second buckets: 60 complete seconds plus the current one
+
+    def __init__(self, addr, transport="tcp", reconnects=0):
+        self.addr = addr
+        self.transport = transport
+        self.reconnects = reconnects
+        self.connected_at = time.time()
+        self.last_seen = None
+
+        self.bytes_received = 0
+        self.events_received = 0
+        self.json_errors = 0
+        self.queue_depth_last = 0
+        self.queue_depth_max = 0
+
+        self._buckets = [0] * self.WINDOW
+        self._second = int(time.monotonic())
+
+    def record(self, nbytes, nevents, queue_depth, now=None):
+        """Account for one read from the socket."""
+        now = time.monotonic() if now is None else now
+        second = int(now)
+        if second != self._second:
+            self._advance(second)
+        self._buckets[second % self.WINDOW] += nevents
+
+        self.bytes_received += nbytes
+        self.events_received += nevents
+        self.last_seen = time.time()
+        self.queue_depth_last = queue_depth
+        if queue_depth > self.queue_depth_max:
+            self.queue_depth_max = queue_depth
+
+    def _advance(self, second):
+        # Zero the buckets of the seconds that passed without traffic
+        for s in range(self._second + 1, min(second, self._second + self.WINDOW) + 1):
+            self._buckets[s % self.WINDOW] = 0
+        self._second = second
+
+    def rate(self, window, now=None):
+        """
+        Events/s over the last `window` complete seconds. Read-only, so other
+        threads can call it while the loop thread is in record().
+        """
+        now = time.monotonic() if now is None else now
+        second = int(now)
+        last = self._second  # Newest bucket record() has written; older ones may be stale
+        window = min(window, self.WINDOW - 1)
+        total = 0
+        for s in range(second - window, second):
+            if last - self.WINDOW < s <= last:
+                total += self._buckets[s % self.WINDOW]
+        return total / window
+
+    def to_dict(self):
+        now = time.monotonic()
+        return {
+            "addr": f"{self.addr[0]}:{self.addr[1]}" if isinstance(self.addr, tuple) else str(self.addr),
+            "transport": self.transport,
+            "bytes_received": self.bytes_received,
+            "events_received": self.events_received,
+            "events_per_sec_1s": self.rate(1, now),
+            "events_per_sec_10s": self.rate(10, now),
+            "events_per_sec_60s": self.rate(60, now),
+            "json_errors": self.json_errors,
+            "queue_depth_last": self.queue_depth_last,
+            "queue_depth_max": self.queue_depth_max,
+            "connected_at": self.connected_at,
+            "last_seen": self.last_seen,
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,72 @@
+import sys
+
+
+class DeviceRegistry:
+    """
+    Assigns a stable numeric id to every broadcaster device descriptor
+    (vid, pid, product_name) seen by the receiver, and resolves descriptors
+    to the interned (device path, display name) identity used for mapping.
+    """
+    # Used for descriptor fields the broadcaster leaves out
+    DEFAULTS = (("vid", "unknown_vid"), ("pid", "unknown_pid"), ("product_name", "Unknown Device"))
+
+    def __init__(self):
+        self._ids = {}  # descriptor_key() -> device id
+        self._devices = []  # device id -> device dict
+        self._identities = {}  # descriptor_key() -> (device path, display name)
+
+    @classmethod
+    def descriptor_key(cls, device):
+        """
+        (vid, pid, product_name) with defaults for missing fields, for
+        registering and deduplicating descriptors. Values stay as sent (null
+        included) so equal keys always give the same device path; anything
+        unhashable is turned into a string.
+        """
+        if not isinstance(device, dict):
+            device = {}
+        key = []
+        for field, default in cls.DEFAULTS:
+            value = device.get(field, default)
+            key.append(value if value is None or type(value) in (str, int) else str(value))
+        return tuple(key)
+
+    def register(self, device):
+        key = self.descriptor_key(device)
+        device_id = self._ids.get(key)
+        if device_id is None:
+            device_id = len(self._devices)
+            self._ids[key] = device_id
+            self._devices.append({"vid": key[0], "pid": key[1], "product_name": key[2]})
+        return device_id
+
+    @staticmethod
+    def make_identity(device):
+        """
+        (device path, display name) for a descriptor. The path is what layouts
+        store in VirtualButton.device_path, e.g. "046d_c077_Logitech_USB_Receiver".
+        """
+        if not isinstance(device, dict):
+            device = {}
+        vid = device.get("vid", "unknown_vid")
+        pid = device.get("pid", "unknown_pid")
+        name = device.get("product_name")
+        name = "Unknown Device" if name is None else str(name)  # null would crash replace()
+        path = f"{vid}_{pid}_{name.replace(' ', '_').replace('-', '_')}"
+        return sys.intern(path), sys.intern(name)
+
+    def identity(self, device):
+        """make_identity(), computed once per distinct descriptor."""
+        key = self.descriptor_key(device)
+        identity = self._identities.get(key)
+        if identity is None:
+            identity = self._identities[key] = self.make_identity(device)
+        return identity
+
+    def get(self, device_id):
+        if 0 <= device_id < len(self._devices):
+            return self._devices[device_id]
+        return None
+
+    def __len__(self):
+        return len(self._devices)
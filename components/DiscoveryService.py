@@ -0,0 +1,156 @@
+import ipaddress
+import socket
+import struct
+import time
+
+import codec
+
+try:
+    import psutil  # Optional: gives real netmasks for every interface
+except ImportError:
+    psutil = None
+
+
+class DiscoveryService:
+    """
+    Answers broadcaster discovery requests from a cached table of local IPv4
+    interfaces. Each requester gets the host address on its own subnet, replies
+    are pre-encoded, and requests are rate-limited per source. Nothing here
+    needs an internet route.
+    """
+    def __init__(self, refresh_interval=30.0, rate=5.0, burst=10, multicast_group=None):
+        self.refresh_interval = refresh_interval
+        self.rate = rate  # Sustained requests/s allowed per source address
+        self.burst = burst
+        self.multicast_group = multicast_group
+
+        self.interfaces = []  # ipaddress.IPv4Interface, loopback last
+        self._answers = {}  # requester ip -> encoded response
+        self._buckets = {}  # requester ip -> [tokens, last refill]
+        self._joined = set()  # Interface addresses joined to the multicast group
+
+        self.replies = 0
+        self.rate_limited = 0
+
+        self.refresh()
+
+    # === Interface table ===
+    def refresh(self, interfaces=None):
+        """
+        Swap in a new interface table. interfaces comes from enumerate_interfaces(),
+        which can block (hostname lookups), so callers on an event loop should run
+        that elsewhere and pass the result in.
+        """
+        if interfaces is None:
+            interfaces = self.enumerate_interfaces()
+        interfaces = list(interfaces)
+        interfaces.sort(key=lambda iface: iface.ip.is_loopback)
+        self.interfaces = interfaces
+        self._answers = {}
+        # Forget idle sources so the bucket table can't grow without bound
+        now = time.monotonic()
+        self._buckets = {ip: b for ip, b in self._buckets.items() if now - b[1] < self.refresh_interval}
+
+    @staticmethod
+    def enumerate_interfaces():
+        found = set()
+        if psutil is not None:
+            try:
+                for addrs in psutil.net_if_addrs().values():
+                    for a in addrs:
+                        if a.family == socket.AF_INET and a.address:
+                            found.add(ipaddress.IPv4Interface(f"{a.address}/{a.netmask or '255.255.255.0'}"))
+            except Exception as e:
+                print(f"[Discovery] psutil interface scan failed: {e}")
+
+        if not found:
+            # Stdlib fallback: every address bound to our hostname, assuming /24 subnets
+            try:
+                for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+                    iface = ipaddress.IPv4Interface(f"{info[4][0]}/24")
+                    if not iface.ip.is_loopback:
+                        found.add(iface)
+            except socket.gaierror:
+                pass
+
+        found.add(ipaddress.IPv4Interface("127.0.0.1/8"))
+        return list(found)
+
+    # === Requests ===
+    def allow(self, requester_ip, now=None):
+        """Token bucket per source address."""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(requester_ip)
+        if bucket is None:
+            self._buckets[requester_ip] = [self.burst - 1, now]
+            return True
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            self.rate_limited += 1
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def response_for(self, requester_ip):
+        answer = self._answers.get(requester_ip)
+        if answer is None:
+            answer = codec.dumps({
+                "type": "discovery_response",
+                "sender": "windows_macro_app",
+                "ip_address": self.address_for(requester_ip)
+            })
+            self._answers[requester_ip] = answer
+        self.replies += 1
+        return answer
+
+    def address_for(self, requester_ip):
+        """Local address on the requester's subnet."""
+        try:
+            requester = ipaddress.IPv4Address(requester_ip)
+        except ValueError:
+            return self._default_address()
+        for iface in self.interfaces:
+            if requester in iface.network:
+                return str(iface.ip)
+        # Not on a directly known subnet: ask the routing table once (no packet is sent)
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.connect((requester_ip, 1))
+            return s.getsockname()[0]
+        except OSError:
+            return self._default_address()
+        finally:
+            s.close()
+
+    def _default_address(self):
+        for iface in self.interfaces:
+            if not iface.ip.is_loopback:
+                return str(iface.ip)
+        return "127.0.0.1"
+
+    # === Multicast ===
+    def join_multicast(self, sock):
+        """Join multicast_group on every known interface not joined yet."""
+        if not self.multicast_group:
+            return
+        group = socket.inet_aton(self.multicast_group)
+        for iface in self.interfaces:
+            addr = str(iface.ip)
+            if addr in self._joined:
+                continue
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                                struct.pack("4s4s", group, socket.inet_aton(addr)))
+                self._joined.add(addr)
+            except OSError as e:
+                print(f"[Discovery] Could not join {self.multicast_group} on {addr}: {e}")
+
+    def stats(self):
+        return {
+            "interfaces": [str(iface) for iface in self.interfaces],
+            "replies": self.replies,
+            "rate_limited": self.rate_limited,
+            "multicast_group": self.multicast_group,
+        }
@@ -0,0 +1,75 @@
+import threading
+
+
+class DispatchIndex:
+    """
+    Maps (key, device path) to the virtual buttons it triggers.
+
+    With device filtering off every mapped button is filed under (key, None) and
+    matches any device; with it on, buttons are filed under their device path and
+    buttons without one never match. Lookups are a single dict get.
+
+    Written on the GUI thread, read on the receiver's dispatch thread: entries are
+    immutable tuples and a full rebuild swaps in a new dict, so readers never see
+    a half-built table and don't need the lock.
+    """
+
+    def __init__(self, virtual_buttons=(), device_filtering=False):
+        self._lock = threading.Lock()
+        self._table = {}
+        self._slots = {}  # vb -> slot it is filed under, for incremental updates
+        self.device_filtering = device_filtering
+        self.rebuild(virtual_buttons, device_filtering)
+
+    def _slot_for(self, vb):
+        if not vb.mapped_key:
+            return None
+        if self.device_filtering:
+            if not vb.device_path:
+                return None
+            return (vb.mapped_key.lower(), vb.device_path)
+        return (vb.mapped_key.lower(), None)
+
+    def rebuild(self, virtual_buttons, device_filtering=None):
+        """Rebuild from scratch (layout loaded, grid resized, filtering toggled)."""
+        with self._lock:
+            if device_filtering is not None:
+                self.device_filtering = bool(device_filtering)
+            table, slots = {}, {}
+            for vb in virtual_buttons:
+                slot = self._slot_for(vb)
+                if slot is None:
+                    continue
+                table[slot] = table.get(slot, ()) + (vb,)
+                slots[vb] = slot
+            self._table, self._slots = table, slots
+
+    def update(self, vb):
+        """Re-file one button after its mapping changed (or add a new one)."""
+        with self._lock:
+            self._unfile(vb)
+            slot = self._slot_for(vb)
+            if slot is not None:
+                self._table[slot] = self._table.get(slot, ()) + (vb,)
+                self._slots[vb] = slot
+
+    def remove(self, vb):
+        with self._lock:
+            self._unfile(vb)
+
+    def _unfile(self, vb):
+        slot = self._slots.pop(vb, None)
+        if slot is None:
+            return
+        remaining = tuple(b for b in self._table.get(slot, ()) if b is not vb)
+        if remaining:
+            self._table[slot] = remaining
+        else:
+            self._table.pop(slot, None)
+
+    def lookup(self, key, device_path):
+        """Buttons triggered by key (already lowercased) from device_path; () if none."""
+        return self._table.get((key, device_path if self.device_filtering else None), ())
+
+    def __len__(self):
+        return len(self._slots)
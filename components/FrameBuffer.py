@@ -0,0 +1,76 @@
+class FrameBuffer:
+    """
+    Preallocated receive buffer that splits a byte stream into newline-delimited frames.
+    Sockets read straight into it (recv_into / asyncio.BufferedProtocol) and newlines are
+    found in place, so a burst of many lines costs one scan instead of repeated copies.
+    """
+    def __init__(self, max_frame_size=64 * 1024, read_size=64 * 1024):
+        self.max_frame_size = max_frame_size
+        self.read_size = read_size
+        self._buf = bytearray(max_frame_size + read_size)
+        self._view = memoryview(self._buf)
+        self._start = 0  # First byte of the pending (incomplete) frame
+        self._end = 0  # End of valid data
+        self._discarding = False  # Skipping the rest of an oversized frame
+        self.oversized_frames = 0
+
+    def get_buffer(self):
+        """Writable view for the next read. Always at least read_size bytes."""
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif len(self._buf) - self._end < self.read_size:
+            # Move the partial frame to the front; it is never larger than max_frame_size
+            pending = self._end - self._start
+            self._buf[:pending] = self._view[self._start:self._end]
+            self._start, self._end = 0, pending
+        return self._view[self._end:]
+
+    def commit(self, nbytes, on_frame):
+        """
+        Account for nbytes written into get_buffer() and pass each complete frame to
+        on_frame as a memoryview into the buffer (decode it, don't keep it).
+        """
+        buf = self._buf
+        start = self._start
+        end = self._end + nbytes
+
+        if self._discarding:
+            nl = buf.find(b"\n", start, end)
+            if nl < 0:
+                self._start = self._end = 0
+                return
+            self._discarding = False
+            start = nl + 1
+
+        nl = buf.find(b"\n", start, end)
+        while nl >= 0:
+            if nl > start:
+                on_frame(self._view[start:nl])  # Only valid during the callback
+            start = nl + 1
+            nl = buf.find(b"\n", start, end)
+
+        if end - start > self.max_frame_size:
+            # A client that never sends a newline can't grow the buffer
+            self.oversized_frames += 1
+            self._discarding = True
+            start = end = 0
+
+        self._start = start
+        self._end = end
+
+    def advance(self, nbytes):
+        """Account for nbytes written into get_buffer() without consuming anything."""
+        self._end += nbytes
+
+    def commit_records(self, nbytes, parse):
+        """Account for nbytes and let parse(buf, start, end) consume whole records; it returns the new start."""
+        self._end += nbytes
+        self._start = parse(self._buf, self._start, self._end)
+        if self._end - self._start > self.max_frame_size:
+            raise ValueError(f"incomplete record over {self.max_frame_size} bytes")
+
+    def peek(self, n):
+        return bytes(self._view[self._start:min(self._end, self._start + n)])
+
+    def pending(self):
+        return self._end - self._start
@@ -0,0 +1,126 @@
+import threading
+from collections import deque
+
+from components.DeviceRegistry import DeviceRegistry
+
+
+class IngestQueue:
+    """
+    Bounded queue between the receiver's event loop and its processor thread.
+
+    press/release events are a priority class: they are delivered ahead of
+    everything else and never dropped. Other events (move, hold, ...) count
+    against maxsize; when full, the overflow policy drops the oldest or the
+    newest of them. Consecutive move/hold events from the same device are
+    coalesced so only the latest one is delivered.
+    """
+    PRIORITY_ACTIONS = frozenset(("press", "release"))
+    COALESCE_ACTIONS = frozenset(("move", "hold"))
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+    def __init__(self, maxsize=4096, overflow="drop_oldest"):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._cond = threading.Condition(threading.Lock())
+        self._priority = deque()  # Events
+        self._bulk = deque()  # [event, device_key, action] entries
+        self._last_bulk = {}  # device_key -> pending coalescible entry
+        self._closed = False
+        self._waiting = False  # Consumer is blocked in get_batch()
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    @staticmethod
+    def _device_key(event):
+        # The receiver has already resolved the device; others (tests, replay) haven't
+        identity = event.get("_device")
+        return identity if identity is not None else DeviceRegistry.descriptor_key(event.get("device", {}))
+
+    def put(self, event):
+        action = event.get("event", {}).get("action")
+        with self._cond:
+            self.enqueued += 1
+            if action in self.PRIORITY_ACTIONS:
+                self._priority.append(event)
+                if self._last_bulk:
+                    # The next move/hold from this device is no longer consecutive
+                    self._last_bulk.pop(self._device_key(event), None)
+            else:
+                device_key = self._device_key(event)
+                last = self._last_bulk.get(device_key)
+                if last is not None and last[2] == action:
+                    last[0] = event  # Latest wins
+                    self.coalesced += 1
+                    return
+                if len(self._priority) + len(self._bulk) >= self.maxsize:
+                    if self.overflow == "drop_newest" or not self._bulk:
+                        self.dropped += 1
+                        return
+                    oldest = self._bulk.popleft()
+                    if self._last_bulk.get(oldest[1]) is oldest:
+                        del self._last_bulk[oldest[1]]
+                    self.dropped += 1
+                entry = [event, device_key, action]
+                self._bulk.append(entry)
+                if action in self.COALESCE_ACTIONS:
+                    self._last_bulk[device_key] = entry
+                else:
+                    self._last_bulk.pop(device_key, None)
+
+            depth = len(self._priority) + len(self._bulk)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if self._waiting:
+                self._cond.notify()
+
+    def get_batch(self, timeout=None):
+        """
+        Wait for events and return everything queued, priority events first.
+        Returns [] on timeout and None once the queue is closed and empty.
+        """
+        with self._cond:
+            if not self._priority and not self._bulk:
+                if self._closed:
+                    return None
+                self._waiting = True
+                self._cond.wait(timeout)
+                self._waiting = False
+                if not self._priority and not self._bulk:
+                    return None if self._closed else []
+
+            batch = list(self._priority)
+            self._priority.clear()
+            if self._bulk:
+                batch.extend(entry[0] for entry in self._bulk)
+                self._bulk.clear()
+                self._last_bulk.clear()
+            return batch
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+
+    def qsize(self):
+        return len(self._priority) + len(self._bulk)
+
+    def stats(self):
+        return {
+            "depth": self.qsize(),
+            "priority_depth": len(self._priority),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "maxsize": self.maxsize,
+            "overflow": self.overflow,
+        }
@@ -0,0 +1,193 @@
+"""
+Key output backends for macro playback.
+
+A backend resolves key names once (when macros are compiled) and then sends
+batches of (action, key) pairs, action being PRESS or RELEASE. Every press and
+release that is due at the same moment goes out in one send() call.
+
+    keyboard   the `keyboard` package (Windows/X11/macOS; root on Linux)
+    uinput     a virtual Linux input device, one write() per batch
+    recording  keeps everything in memory, for tests and benchmarks
+"""
+import os
+import struct
+import sys
+import threading
+import time
+
+from components.MacroTimeline import RELEASE
+
+BACKENDS = ("keyboard", "uinput", "recording")
+
+
+class KeyboardBackend:
+    """Injects through the `keyboard` package (imported on first use)."""
+    name = "keyboard"
+
+    def __init__(self):
+        import keyboard
+        self._keyboard = keyboard
+
+    def probe(self):
+        """Fail now rather than on the first macro step if keyboard can't inject here."""
+        if sys.platform.startswith("linux") and os.geteuid() != 0:
+            raise OSError("the keyboard package needs root on Linux")
+        self._keyboard.key_to_scan_codes("shift")
+
+    def resolve(self, key):
+        # Parse once so press/release don't re-parse the name every time
+        try:
+            return self._keyboard.parse_hotkey(key)
+        except Exception:
+            return key
+
+    def send(self, batch):
+        press, release = self._keyboard.press, self._keyboard.release
+        for action, key in batch:
+            (release if action == RELEASE else press)(key)
+
+    def close(self):
+        pass
+
+
+# Linux input-event-codes.h
+_EV_SYN, _EV_KEY, _SYN_REPORT = 0x00, 0x01, 0
+_UI_SET_EVBIT, _UI_SET_KEYBIT = 0x40045564, 0x40045565
+_UI_DEV_CREATE, _UI_DEV_DESTROY = 0x5501, 0x5502
+_BUS_VIRTUAL = 0x06
+_INPUT_EVENT = struct.Struct("llHHi")
+
+LINUX_KEY_CODES = {
+    "esc": 1, "1": 2, "2": 3, "3": 4, "4": 5, "5": 6, "6": 7, "7": 8, "8": 9, "9": 10, "0": 11,
+    "-": 12, "=": 13, "backspace": 14, "tab": 15,
+    "q": 16, "w": 17, "e": 18, "r": 19, "t": 20, "y": 21, "u": 22, "i": 23, "o": 24, "p": 25,
+    "[": 26, "]": 27, "enter": 28, "ctrl": 29, "left ctrl": 29,
+    "a": 30, "s": 31, "d": 32, "f": 33, "g": 34, "h": 35, "j": 36, "k": 37, "l": 38,
+    ";": 39, "'": 40, "`": 41, "shift": 42, "left shift": 42, "\\": 43,
+    "z": 44, "x": 45, "c": 46, "v": 47, "b": 48, "n": 49, "m": 50, ",": 51, ".": 52, "/": 53,
+    "right shift": 54, "alt": 56, "left alt": 56, "space": 57, "caps lock": 58,
+    "f1": 59, "f2": 60, "f3": 61, "f4": 62, "f5": 63, "f6": 64, "f7": 65, "f8": 66, "f9": 67, "f10": 68,
+    "num lock": 69, "scroll lock": 70, "f11": 87, "f12": 88,
+    "right ctrl": 97, "right alt": 100, "alt gr": 100,
+    "home": 102, "up": 103, "page up": 104, "left": 105, "right": 106, "end": 107,
+    "down": 108, "page down": 109, "insert": 110, "delete": 111,
+    "volume mute": 113, "volume down": 114, "volume up": 115, "pause": 119,
+    "windows": 125, "left windows": 125, "right windows": 126, "menu": 127,
+    "next track": 163, "play/pause media": 164, "previous track": 165,
+}
+
+
+class UinputBackend:
+    """
+    Writes to a virtual keyboard created through /dev/uinput (needs write access,
+    e.g. root or the input group). A batch becomes one write() of all its key
+    events plus a single SYN_REPORT.
+    """
+    name = "uinput"
+
+    def __init__(self, path="/dev/uinput", device_name="NumcroPad virtual keyboard"):
+        import fcntl
+        self._fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            fcntl.ioctl(self._fd, _UI_SET_EVBIT, _EV_KEY)
+            for code in sorted(set(LINUX_KEY_CODES.values())):
+                fcntl.ioctl(self._fd, _UI_SET_KEYBIT, code)
+            # Legacy struct uinput_user_dev: name, input_id, ff_effects_max, 4 x 64 abs values
+            setup = struct.pack("80sHHHHI", device_name.encode()[:79], _BUS_VIRTUAL, 0x1209, 0x0001, 1, 0)
+            os.write(self._fd, setup + bytes(4 * 64 * 4))
+            fcntl.ioctl(self._fd, _UI_DEV_CREATE)
+        except OSError:
+            os.close(self._fd)
+            raise
+        self._ioctl = fcntl.ioctl
+        self._lock = threading.Lock()
+        self._syn = _INPUT_EVENT.pack(0, 0, _EV_SYN, _SYN_REPORT, 0)
+
+    def resolve(self, key):
+        """Key name (or "ctrl+z" combination) -> tuple of Linux key codes."""
+        codes = []
+        for part in key.lower().split("+"):
+            code = LINUX_KEY_CODES.get(part.strip())
+            if code is None:
+                raise ValueError(f"No Linux key code for '{part}'")
+            codes.append(code)
+        return tuple(codes)
+
+    def encode(self, batch):
+        """The bytes send() writes for batch."""
+        pack = _INPUT_EVENT.pack
+        out = []
+        for action, codes in batch:
+            value = 0 if action == RELEASE else 1
+            for code in (reversed(codes) if action == RELEASE else codes):
+                out.append(pack(0, 0, _EV_KEY, code, value))
+        out.append(self._syn)
+        return b"".join(out)
+
+    def send(self, batch):
+        data = self.encode(batch)
+        with self._lock:
+            os.write(self._fd, data)
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                self._ioctl(self._fd, _UI_DEV_DESTROY)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+
+class RecordingBackend:
+    """Remembers every batch as (perf_counter time, ((action, key), ...)); injects nothing."""
+    name = "recording"
+
+    def __init__(self, limit=100000):
+        self.limit = limit
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def resolve(self, key):
+        return key
+
+    def send(self, batch):
+        entry = (time.perf_counter(), batch)
+        with self._lock:
+            if len(self.batches) >= self.limit:
+                del self.batches[:len(self.batches) // 2]
+            self.batches.append(entry)
+
+    def events(self):
+        """Flattened [(time, "press"/"release", key), ...]."""
+        with self._lock:
+            return [(t, "release" if action == RELEASE else "press", key)
+                    for t, batch in self.batches for action, key in batch]
+
+    def clear(self):
+        with self._lock:
+            self.batches.clear()
+
+    def close(self):
+        pass
+
+
+def create_backend(name="keyboard"):
+    """
+    Builds the named backend, falling back to the others (recording last, which
+    injects nothing) with a message when it can't be opened or used here.
+    """
+    factories = {"keyboard": KeyboardBackend, "uinput": UinputBackend, "recording": RecordingBackend}
+    if name not in factories:
+        print(f"[KeyOutput] Unknown backend '{name}', using keyboard")
+        name = "keyboard"
+    for candidate in dict.fromkeys((name, "keyboard", "uinput")):
+        try:
+            backend = factories[candidate]()
+            probe = getattr(backend, "probe", None)
+            if probe is not None:
+                probe()
+            return backend
+        except Exception as e:
+            print(f"[KeyOutput] {candidate} backend unavailable: {e}", file=sys.stderr)
+    print("[KeyOutput] No key output available; macros will be recorded, not typed", file=sys.stderr)
+    return RecordingBackend()
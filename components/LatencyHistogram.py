@@ -0,0 +1,93 @@
+import bisect
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram. Buckets are log-spaced, four per doubling
+    (~19% resolution) from 1 us to ~16 s, so recording is a bisect and an
+    increment. Percentiles report the upper bound of their bucket.
+    """
+    BOUNDS = tuple(1e-6 * 2 ** (i / 4) for i in range(97))
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds < 0:
+            seconds = 0.0
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        target = pct / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class LatencyTracker:
+    """Named histograms for the stages of the input pipeline."""
+
+    def __init__(self, stages):
+        self.enabled = True
+        self.stages = {name: LatencyHistogram(name) for name in stages}
+
+    def record(self, stage, seconds):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = LatencyHistogram(stage)
+        hist.record(seconds)
+
+    def reset(self):
+        for hist in self.stages.values():
+            hist.reset()
+
+    def to_dict(self):
+        return {name: hist.to_dict() for name, hist in self.stages.items()}
+
+    def dump(self):
+        """Human-readable table, one line per stage (times in ms)."""
+        lines = [f"{'stage':<8} {'count':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+        for name, hist in self.stages.items():
+            d = hist.to_dict()
+            lines.append(f"{name:<8} {d['count']:>8} {d['p50'] * 1e3:>8.3f} {d['p95'] * 1e3:>8.3f} "
+                         f"{d['p99'] * 1e3:>8.3f} {d['max'] * 1e3:>8.3f}")
+        return "\n".join(lines)
+
+
+# Pipeline stages, in order. Host-side stamps use time.perf_counter(); "wire" compares the
+# broadcaster's wall-clock timestamp with ours, so it is only meaningful with synced clocks.
+#   wire     broadcaster timestamp -> socket receive
+#   decode   socket receive -> enqueue
+#   queue    enqueue -> dequeue on the dispatch thread
+#   handoff  dequeue -> live.on_raw_input entry
+#   chord    first key held back by the ChordEngine -> trigger fired or keys released
+#   match    on_raw_input entry -> virtual button matched
+#   inject   match -> first key injection of the macro
+#   total    socket receive -> first key injection
+PIPELINE = LatencyTracker(["wire", "decode", "queue", "handoff", "chord", "match", "inject", "total"])
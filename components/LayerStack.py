@@ -0,0 +1,128 @@
+import threading
+
+from components.ChordEngine import ChordEngine
+from components.DispatchIndex import DispatchIndex
+
+BASE_LAYER = "base"
+
+
+class Layer:
+    """A layout compiled for dispatch: its buttons, (key, device) index and chord engine."""
+
+    def __init__(self, name, virtual_buttons, device_filtering=False):
+        self.name = name
+        self.virtual_buttons = virtual_buttons
+        self.index = DispatchIndex(virtual_buttons, device_filtering)
+        self.chords = ChordEngine(virtual_buttons, device_filtering)
+
+    def rebuild(self, virtual_buttons=None, device_filtering=None):
+        if virtual_buttons is not None:
+            self.virtual_buttons = virtual_buttons
+        self.index.rebuild(self.virtual_buttons, device_filtering)
+        self.chords.rebuild(self.virtual_buttons, device_filtering)
+
+
+class LayerStack:
+    """
+    The layout being edited (the base layer) plus other layouts held compiled in
+    memory, so a layer key can change what the pad does without touching disk
+    or the table widgets.
+
+    The active layer, the layer dict and the layers to return to belong to the
+    dispatch thread: layer keys change them there, and it is the only reader of
+    `active`. replace_layers() compiles new layers on the GUI thread and leaves
+    them in a slot that the dispatch thread swaps in with apply_pending().
+    """
+
+    def __init__(self, virtual_buttons=(), device_filtering=False):
+        self.device_filtering = device_filtering
+        self.base = Layer(BASE_LAYER, list(virtual_buttons), device_filtering)
+        self.layers = {BASE_LAYER: self.base}
+        self.active = self.base
+        self._previous = []  # Layers to return to when a hold is released / toggle is undone
+        self._pending = None  # Layer dict from replace_layers() not swapped in yet
+        self._pending_lock = threading.Lock()
+        self.switches = 0
+
+    def replace_layers(self, layouts):
+        """
+        layouts: {name: [VirtualButton, ...]}. The base layer is kept. The new
+        layers take effect at the dispatch thread's next apply_pending().
+        """
+        layers = {BASE_LAYER: self.base}
+        for name, virtual_buttons in layouts.items():
+            if name != BASE_LAYER:
+                layers[name] = Layer(name, virtual_buttons, self.device_filtering)
+        with self._pending_lock:
+            self._pending = layers
+
+    def apply_pending(self):
+        """
+        Swap in the layers from replace_layers(), if any (dispatch thread).
+        Returns the new active layer if that changed, else None.
+        """
+        if self._pending is None:
+            return None
+        with self._pending_lock:
+            layers, self._pending = self._pending, None
+        # Keep the user on the same layers by name; ones that are gone fall back to base
+        self._previous = [layers.get(layer.name, self.base) for layer in self._previous]
+        old = self.active
+        self.active = layers.get(old.name, self.base)
+        self.layers = layers
+        if self.active is old:
+            return None
+        old.chords.hand_over(self.active.chords)  # Held chord keys still release
+        return self.active
+
+    def set_device_filtering(self, enabled):
+        self.device_filtering = bool(enabled)
+        for layer in self._latest().values():
+            layer.rebuild(device_filtering=self.device_filtering)
+
+    def _latest(self):
+        # The layers from the last replace_layers(), whether swapped in yet or not
+        pending = self._pending
+        return self.layers if pending is None else pending
+
+    def get(self, name):
+        return self._latest().get(name)
+
+    # === Switching (dispatch thread) ===
+    def switch(self, name):
+        """Make name the active layer for good. Returns the layer switched to, or None."""
+        layer = self.layers.get(name)
+        if layer is None:
+            return None
+        self._previous.clear()
+        return self._activate(layer)
+
+    def push(self, name):
+        """Activate name, remembering the current layer for pop()."""
+        layer = self.layers.get(name)
+        if layer is None:
+            return None
+        self._previous.append(self.active)
+        return self._activate(layer)
+
+    def pop(self, name):
+        """Leave name (if it is the active layer) for the layer active before it."""
+        if self.active.name != name or not self._previous:
+            return None
+        return self._activate(self._previous.pop())
+
+    def toggle(self, name):
+        if self.active.name == name and self._previous:
+            return self.pop(name)
+        return self.push(name)
+
+    def _activate(self, layer):
+        self.switches += 1
+        self.active = layer
+        return layer
+
+    def names(self):
+        return list(self._latest())
+
+    def __len__(self):
+        return len(self._latest())
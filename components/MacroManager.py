@@ -1,4 +1,4 @@
-import json
+import codec
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QListWidget, QHBoxLayout,
@@ -19,9 +19,11 @@ class MacroManager(QDialog):
     macro_recorded = pyqtSignal(str, dict)  # macro_id, macro_data
     macros_deleted = pyqtSignal(set)  # Emit set of deleted macro IDs
     recording_stopped = pyqtSignal()
+    macros_saved = pyqtSignal(dict)  # All macros, after every write to MACRO_FILE
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, optimizer=None):
         super().__init__(parent)
+        self.optimizer = optimizer  # MacroOptimizer applied on every save, if set
         self.recording_stopped.connect(self.reset_ui)
         self.macro_recorded.connect(self.on_macro_recorded)
         self.recording = False
@@ -98,11 +100,9 @@ class MacroManager(QDialog):
 
     def record_loop(self):
         macro = []
-        last_time = time.time()
+        start_time = None  # First key down; delays are offsets from it, as playback reads them
         key_down_times = {}
 
-        first_event = True  # Track whether this is the first recorded key
-
         while self.recording or not self.event_queue.empty():
             try:
                 e = self.event_queue.get(timeout=0.05)
@@ -112,8 +112,9 @@ class MacroManager(QDialog):
             now = time.time()
 
             if e.event_type == keyboard.KEY_DOWN:
-                delay = 0 if first_event else round(now - last_time, 3)
-                last_time = now
+                if start_time is None:
+                    start_time = now
+                delay = round(now - start_time, 3)
                 key_down_times[e.name] = now
 
                 if e.name == "esc":
@@ -121,7 +122,6 @@ class MacroManager(QDialog):
                     break
 
                 macro.append({"key": e.name, "delay": delay, "duration": None})
-                first_event = False
 
             elif e.event_type == keyboard.KEY_UP:
                 if e.name in key_down_times:
@@ -154,8 +154,7 @@ class MacroManager(QDialog):
 
     def load_macros(self):
         try:
-            with open(MACRO_FILE, "r") as f:
-                return json.load(f)
+            return codec.load_file(MACRO_FILE)
         except FileNotFoundError:
             return {}
 
@@ -169,7 +168,7 @@ class MacroManager(QDialog):
     def load_macro(self, item):
         macro_id = item.data(Qt.UserRole)
         if macro_id in self.macros:
-            pretty_json = json.dumps(self.macros[macro_id], indent=2)
+            pretty_json = codec.dumps_pretty(self.macros[macro_id])
             self.original_text = pretty_json
             self.editor.setPlainText(pretty_json)
             self.save_btn.setEnabled(False)  # Start disabled
@@ -189,7 +188,7 @@ class MacroManager(QDialog):
 
     def save_macro_changes(self):
         try:
-            new_data = json.loads(self.editor.toPlainText())
+            new_data = codec.loads(self.editor.toPlainText())
             selected_items = self.macro_list.selectedItems()
             if not selected_items:
                 return
@@ -199,13 +198,17 @@ class MacroManager(QDialog):
                 self.save_macros()
                 self.refresh_macro_list()
 
-                # Update the saved state
-                self.original_text = self.editor.toPlainText()
+                # Show what was saved (the optimizer may have changed it)
+                self.original_text = codec.dumps_pretty(self.macros[macro_id])
+                self.editor.setPlainText(self.original_text)
                 self.save_btn.setEnabled(False)
 
         except Exception as e:
             QMessageBox.warning(self, "Invalid JSON", str(e))
 
     def save_macros(self):
-        with open(MACRO_FILE, "w") as f:
-            json.dump(self.macros, f, indent=2)
\ No newline at end of file
+        if self.optimizer is not None:
+            self.macros, report = self.optimizer.optimize_all(self.macros)
+            print(f"[Macros] Optimized on save: {self.optimizer.describe(report)}")
+        codec.dump_file(self.macros, MACRO_FILE)
+        self.macros_saved.emit(self.macros)
\ No newline at end of file
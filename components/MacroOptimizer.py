@@ -0,0 +1,120 @@
+from components.MacroTimeline import MacroTimeline
+
+
+class MacroOptimizer:
+    """
+    Cleans up recorded macros before they are saved:
+      - keys recorded without a release (duration None) are held until their
+        next press, or the macro's last release, instead of being tapped
+      - with grid_ms, press and release times are rounded to that grid
+      - press/release times within merge_ms of each other are made equal, so
+        they play as one batch
+      - steps without a key, and presses that start while an earlier press of
+        the same key is still down (the earlier press is extended instead), are
+        dropped
+    Delays are offsets from the macro start, as MacroManager records them and
+    playback reads them. Running it twice changes nothing the second time.
+    """
+
+    def __init__(self, merge_ms=1.0, grid_ms=None):
+        self.merge = max(merge_ms or 0.0, 0.0) / 1000.0
+        self.grid = grid_ms / 1000.0 if grid_ms else None
+
+    def optimize(self, macro):
+        """Returns (optimized copy of macro, report dict)."""
+        report = {"normalized": 0, "quantized": 0, "merged": 0, "dropped": 0}
+        steps = []  # [start, end, key]; end None until normalized
+        for step in macro.get("steps", []):
+            key = step.get("key")
+            if not key:
+                report["dropped"] += 1
+                continue
+            start = max(float(step.get("delay") or 0), 0.0)
+            duration = step.get("duration")
+            end = None if duration is None else round(start + max(float(duration), 0.0), 6)
+            steps.append([start, end, key])
+
+        # An unreleased key is held until its next press, or else the macro's end
+        last = max((max(s[0], s[1] or 0.0) for s in steps), default=0.0)
+        next_press = {}
+        for s in sorted(steps, key=lambda s: s[0], reverse=True):
+            if s[1] is None:
+                s[1] = next_press.get(s[2], last)
+                report["normalized"] += 1
+            next_press[s[2]] = s[0]
+
+        if self.grid:
+            for s in steps:
+                start = round(round(s[0] / self.grid) * self.grid, 6)
+                end = max(round(round(s[1] / self.grid) * self.grid, 6), start)
+                if (start, end) != (s[0], s[1]):
+                    report["quantized"] += 1
+                s[0], s[1] = start, end
+
+        if self.merge:
+            # Each time moves to the first time of its cluster (no chaining past merge_ms)
+            snap = {}
+            anchor = None
+            for t in sorted({t for s in steps for t in s[:2]}):
+                if anchor is None or t - anchor > self.merge:
+                    anchor = t
+                snap[t] = anchor
+            for s in steps:
+                start, end = snap[s[0]], snap[s[1]]
+                end = max(end, start)
+                report["merged"] += (start != s[0]) + (end != s[1])
+                s[0], s[1] = start, end
+
+        steps.sort(key=lambda s: s[0])
+        held = {}  # key -> its latest kept step
+        kept = []
+        for s in steps:
+            prev = held.get(s[2])
+            if prev is not None and (s[0] < prev[1] or s[0] == prev[0]):
+                prev[1] = max(prev[1], s[1])  # Already down: OS sees no new press
+                report["dropped"] += 1
+                continue
+            held[s[2]] = s
+            kept.append(s)
+
+        optimized = dict(macro)
+        optimized["steps"] = [{"key": key, "delay": round(start, 6), "duration": round(end - start, 6)}
+                              for start, end, key in kept]
+
+        before, after = MacroTimeline.compile(macro), MacroTimeline.compile(optimized)
+        report.update({
+            "steps_before": len(macro.get("steps", [])),
+            "steps_after": len(kept),
+            "injections_before": len(before.actions),
+            "injections_after": len(after.actions),
+            "batches_before": len(before),
+            "batches_after": len(after),
+        })
+        return optimized, report
+
+    def optimize_all(self, macros):
+        """Returns ({id: optimized macro}, summed report). Macros that fail to parse are kept as they are."""
+        out = {}
+        totals = {}
+        for macro_id, macro in macros.items():
+            try:
+                out[macro_id], report = self.optimize(macro)
+            except (TypeError, ValueError, AttributeError) as e:
+                print(f"[MacroOptimizer] Leaving macro '{macro_id}' as is: {e}")
+                out[macro_id] = macro
+                continue
+            for name, value in report.items():
+                totals[name] = totals.get(name, 0) + value
+        return out, totals
+
+    @staticmethod
+    def describe(report):
+        """One-line summary for the log."""
+        if not report:
+            return "nothing to optimize"
+        saved = report["injections_before"] - report["injections_after"]
+        batches = report["batches_before"] - report["batches_after"]
+        return (f"{saved} key events and {batches} output batches saved "
+                f"({report['injections_after']} events in {report['batches_after']} batches); "
+                f"{report['merged']} times merged, {report['quantized']} quantized, "
+                f"{report['normalized']} unreleased keys fixed, {report['dropped']} steps dropped")
@@ -0,0 +1,166 @@
+import threading
+from collections import deque
+
+POLICIES = ("overlap", "queue", "restart", "drop")
+
+
+class _Owner:
+    __slots__ = ("label", "running", "queue", "started", "queued", "dropped", "cancelled")
+
+    def __init__(self, label):
+        self.label = label
+        self.running = []  # Run ids in flight, oldest first
+        self.queue = deque()  # launch callbacks waiting their turn
+        self.started = 0
+        self.queued = 0
+        self.dropped = 0
+        self.cancelled = 0
+
+    def to_dict(self):
+        return {
+            "running": len(self.running),
+            "waiting": len(self.queue),
+            "started": self.started,
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+        }
+
+
+class MacroRunner:
+    """
+    Decides whether a button press starts a macro run, on top of a
+    MacroScheduler. Each owner (a virtual button) has a policy for presses
+    that arrive while its previous run is still playing:
+        "overlap"  start another run alongside it
+        "queue"    start it when the previous run ends (up to queue_limit waiting)
+        "restart"  cancel the previous run and start this one
+        "drop"     ignore the press
+    No more than max_runs runs play at once across all owners; past that,
+    "queue" presses wait and the others are dropped.
+
+    launch(on_done, queued) must start a run on the scheduler and return its
+    run id (or None), arranging for on_done(run, cancelled) to be called when
+    it ends. queued is True when the run was held back first.
+    """
+
+    def __init__(self, scheduler, max_runs=32):
+        self.scheduler = scheduler
+        try:
+            self.max_runs = max(1, int(max_runs))
+        except (TypeError, ValueError):
+            print(f"[MacroRunner] Invalid max_runs {max_runs!r}, using 32")
+            self.max_runs = 32
+        self._lock = threading.RLock()  # on_done can re-enter from submit()/cancel()
+        self._owners = {}  # owner -> _Owner
+        self._waiting = deque()  # Owners with queued runs held back by max_runs
+        self._running = 0
+        self.capped = 0
+
+    def submit(self, owner, launch, policy="overlap", queue_limit=4, label=None):
+        """Start, queue or drop a run for owner. Returns the run id, or None if none started now."""
+        if policy not in POLICIES:
+            print(f"[MacroRunner] Unknown policy {policy!r} for '{label}', using 'overlap'")
+            policy = "overlap"
+        with self._lock:
+            state = self._owners.get(owner)
+            if state is None:
+                state = self._owners[owner] = _Owner(label if label is not None else str(owner))
+            busy = bool(state.running) or bool(state.queue)
+
+            if busy and policy == "drop":
+                state.dropped += 1
+                return None
+            if busy and policy == "queue":
+                return self._enqueue(owner, state, launch, queue_limit)
+            if busy and policy == "restart":
+                state.queue.clear()
+                restart = list(state.running)
+            else:
+                restart = ()
+
+        for run_id in restart:
+            if self.scheduler.cancel(run_id):
+                with self._lock:
+                    state.cancelled += 1
+
+        with self._lock:
+            if self._running >= self.max_runs:
+                if policy == "queue":
+                    return self._enqueue(owner, state, launch, queue_limit)
+                self.capped += 1
+                state.dropped += 1
+                return None
+            return self._start(owner, state, launch, False)
+
+    def _enqueue(self, owner, state, launch, queue_limit):
+        # Caller holds the lock
+        if len(state.queue) >= queue_limit:
+            state.dropped += 1
+            return None
+        state.queue.append(launch)
+        state.queued += 1
+        if not state.running and owner not in self._waiting:
+            self._waiting.append(owner)  # Nothing of its own will finish to start it
+        return None
+
+    def _start(self, owner, state, launch, queued):
+        # Caller holds the lock
+        self._running += 1
+        run_ids = []
+
+        def on_done(run, cancelled):
+            self._finished(owner, state, run_ids, run.run_id)
+        run_id = launch(on_done, queued)
+        if run_id is None:
+            self._running -= 1
+            return None
+        if not run_ids:  # on_done hasn't already run (empty macro)
+            state.running.append(run_id)
+        state.started += 1
+        return run_id
+
+    def _finished(self, owner, state, run_ids, run_id):
+        with self._lock:
+            run_ids.append(run_id)
+            self._running -= 1
+            if run_id in state.running:
+                state.running.remove(run_id)
+            # The owner's own queue goes first, then owners held back by max_runs
+            self._pump(owner, state)
+            for _ in range(len(self._waiting)):
+                if self._running >= self.max_runs:
+                    break
+                waiting = self._waiting.popleft()
+                self._pump(waiting, self._owners[waiting])
+
+    def _pump(self, owner, state):
+        # Caller holds the lock. Start owner's next queued run if it has none playing.
+        while state.queue and not state.running and self._running < self.max_runs:
+            self._start(owner, state, state.queue.popleft(), True)
+        if state.queue and not state.running and owner not in self._waiting:
+            self._waiting.append(owner)
+
+    def clear_queues(self):
+        """Drop every queued run, e.g. before cancelling everything on shutdown."""
+        with self._lock:
+            for state in self._owners.values():
+                state.queue.clear()
+            self._waiting.clear()
+
+    def running(self):
+        return self._running
+
+    def stats(self):
+        """Totals plus per-owner counters, keyed by label."""
+        with self._lock:
+            owners = {state.label: state.to_dict() for state in self._owners.values()}
+            totals = {
+                "running": self._running,
+                "max_runs": self.max_runs,
+                "capped": self.capped,
+                "queued": sum(o["queued"] for o in owners.values()),
+                "dropped": sum(o["dropped"] for o in owners.values()),
+                "cancelled": sum(o["cancelled"] for o in owners.values()),
+            }
+        return totals, owners
@@ -0,0 +1,261 @@
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+import traceback
+
+from components.LatencyHistogram import LatencyHistogram
+
+
+class MacroRun:
+    """
+    One submitted timeline. Step i runs fire(i) at start + offsets[i]; offsets
+    must be sorted. cursor is the index of the next step to run, context is
+    whatever the submitter wants on_done to see (e.g. the MacroTimeline).
+    """
+    __slots__ = ("run_id", "offsets", "fire", "start", "cursor", "on_done", "context", "cancelled", "done")
+
+    def __init__(self, run_id, offsets, fire, start, on_done, context):
+        self.run_id = run_id
+        self.offsets = offsets
+        self.fire = fire
+        self.start = start
+        self.cursor = 0
+        self.on_done = on_done
+        self.context = context
+        self.cancelled = False
+        self.done = False
+
+
+class MacroScheduler:
+    """
+    Runs the timed actions of every macro on a single thread.
+
+    The heap holds one entry per active run: the deadline of its next step.
+    After a step runs, the run's following step is pushed back, so a long
+    macro costs one heap operation per step and never holds up other runs.
+    Deadlines are time.perf_counter() values. Steps run on the scheduler
+    thread and must be quick (a key press, not a sleep).
+
+    on_done(run, cancelled) is called once per run: on the scheduler thread
+    when the last step has run, or when it is cancelled.
+
+    precise=True sleeps until spin_margin before a deadline and spins (yielding
+    the GIL) for the rest, so steps land within tens of microseconds instead of
+    the OS timer's oversleep. spin_margin is calibrated when the thread starts.
+    high_priority=True also asks the OS to raise the scheduler thread's priority
+    (silently skipped where that isn't permitted). Each step's scheduled-vs-
+    actual error goes to the lateness histogram either way.
+    """
+
+    def __init__(self, name="MacroScheduler", precise=False, high_priority=False):
+        self.name = name
+        self.precise = precise
+        self.high_priority = high_priority
+        self.spin_margin = 0.0
+        self.priority_raised = False
+        self._heap = []  # (deadline, seq, MacroRun)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._runs = {}  # run id -> MacroRun
+        self._current = None  # Run whose step is executing right now
+        self._running = False
+        self._thread = None
+        self.lateness = LatencyHistogram("lateness")
+        self.steps_run = 0
+        self.runs_finished = 0
+        self.runs_cancelled = 0
+        self.max_depth = 0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    # === Timing setup (scheduler thread) ===
+    def _raise_priority(self):
+        try:
+            if sys.platform == "win32":
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                THREAD_PRIORITY_TIME_CRITICAL = 15
+                self.priority_raised = bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(),
+                                                                       THREAD_PRIORITY_TIME_CRITICAL))
+            else:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), -10)
+                self.priority_raised = True
+        except (OSError, AttributeError, ImportError) as e:
+            print(f"[MacroScheduler] Could not raise thread priority: {e}")
+
+    def _set_timer_resolution(self, enable):
+        # Windows timers tick every ~15.6 ms unless asked for 1 ms
+        if sys.platform != "win32":
+            return
+        try:
+            import ctypes
+            winmm = ctypes.windll.winmm
+            (winmm.timeBeginPeriod if enable else winmm.timeEndPeriod)(1)
+        except (OSError, AttributeError, ImportError):
+            pass
+
+    def calibrate(self, samples=20, request=0.001):
+        """Measure how far a short wait oversleeps here and size spin_margin from it."""
+        event = threading.Event()
+        overshoot = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            event.wait(request)
+            overshoot.append(time.perf_counter() - start - request)
+        overshoot.sort()
+        p90 = overshoot[int(len(overshoot) * 0.9) - 1]
+        self.spin_margin = min(max(p90 + 0.0002, 0.0003), 0.004)
+        return self.spin_margin
+
+    # === Submitting ===
+    def submit(self, offsets, fire, start=None, on_done=None, context=None):
+        """
+        Schedule fire(i) at start + offsets[i] for every step i (start defaults
+        to now). offsets is read in place, so a compiled timeline can be shared
+        by any number of runs. Returns the run id, for cancel().
+        """
+        if not self._running:
+            self.start()
+        run = MacroRun(next(self._ids), offsets, fire,
+                       time.perf_counter() if start is None else start, on_done, context)
+        if not len(offsets):
+            run.done = True
+            if on_done is not None:
+                on_done(run, False)
+            return run.run_id
+        with self._cond:
+            self._runs[run.run_id] = run
+            self._push(run)
+        return run.run_id
+
+    def call_at(self, deadline, fn, arg=None, on_done=None):
+        """Run fn(arg) once at perf_counter() time deadline."""
+        return self.submit((0.0,), lambda _: fn(arg), start=deadline, on_done=on_done)
+
+    def _push(self, run):
+        # Caller holds the lock
+        entry = (run.start + run.offsets[run.cursor], next(self._seq), run)
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > self.max_depth:
+            self.max_depth = len(self._heap)
+        if self._heap[0] is entry:
+            self._cond.notify()  # New earliest deadline
+
+    def cancel(self, run_id):
+        """Stop a run before its remaining steps. Returns False if it had already finished."""
+        with self._cond:
+            run = self._runs.pop(run_id, None)
+            if run is None or run.cancelled:
+                return False
+            run.cancelled = True
+            self.runs_cancelled += 1
+            if self._current is run:
+                return True  # The scheduler thread finishes it after the step in progress
+        if run.on_done is not None:
+            run.on_done(run, True)
+        return True
+
+    def cancel_all(self):
+        for run_id in list(self._runs):
+            self.cancel(run_id)
+
+    def is_active(self, run_id):
+        return run_id in self._runs
+
+    # === Scheduler thread ===
+    def _run_loop(self):
+        if self.high_priority:
+            self._raise_priority()
+        if self.precise:
+            self._set_timer_resolution(True)
+            self.calibrate()
+        try:
+            self._dispatch_steps()
+        finally:
+            if self.precise:
+                self._set_timer_resolution(False)
+
+    def _dispatch_steps(self):
+        heap = self._heap
+        margin = self.spin_margin
+        perf_counter, sleep = time.perf_counter, time.sleep
+        while True:
+            with self._cond:
+                while self._running:
+                    if heap:
+                        wait = heap[0][0] - perf_counter() - margin
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if not self._running:
+                    return
+                deadline, _, run = heapq.heappop(heap)
+                if run.cancelled:
+                    continue  # Stale entry; on_done already called
+                self._current = run
+
+            if margin:
+                # Spin out the last stretch; sleep(0) lets other threads have the GIL
+                while perf_counter() < deadline:
+                    sleep(0)
+            if not run.cancelled:  # May have been cancelled while spinning
+                self.lateness.record(perf_counter() - deadline)
+                step = run.cursor
+                run.cursor += 1
+                try:
+                    run.fire(step)
+                except Exception as e:
+                    print(f"[MacroScheduler] Step failed: {e}\n{traceback.format_exc()}")
+                self.steps_run += 1
+
+            with self._cond:
+                self._current = None
+                finished = run.cancelled or run.cursor >= len(run.offsets)
+                if not finished:
+                    self._push(run)
+                elif not run.cancelled:
+                    run.done = True
+                    self._runs.pop(run.run_id, None)
+                    self.runs_finished += 1
+            if finished and run.on_done is not None:
+                try:
+                    run.on_done(run, run.cancelled)
+                except Exception as e:
+                    print(f"[MacroScheduler] on_done failed: {e}\n{traceback.format_exc()}")
+
+    # === Stats ===
+    def depth(self):
+        return len(self._heap)
+
+    def stats(self):
+        return {
+            "depth": len(self._heap),
+            "max_depth": self.max_depth,
+            "active_runs": len(self._runs),
+            "steps_run": self.steps_run,
+            "runs_finished": self.runs_finished,
+            "runs_cancelled": self.runs_cancelled,
+            "precise": self.precise,
+            "spin_margin": self.spin_margin,
+            "priority_raised": self.priority_raised,
+            "lateness": self.lateness.to_dict(),
+        }
@@ -0,0 +1,81 @@
+import sys
+from array import array
+
+PRESS = 0
+RELEASE = 1
+
+
+class MacroTimeline:
+    """
+    A macro compiled into a flat, time-sorted list of key actions.
+
+    Action i presses or releases keys[i]; actions is a bytes object (PRESS or
+    RELEASE per action), keys the keys as the output backend wants them
+    (resolve() at compile time) and names the original key names. Actions due
+    at the same moment form one step: step g sends batches[g], a tuple of
+    (action, key) pairs, at offsets[g] seconds after the macro starts, so an
+    output backend can inject simultaneous keys together. Step delays are
+    offsets from the macro start, as the recorder writes them.
+
+    Built once per macro when macros are loaded or saved and shared by every
+    run, so triggering a macro doesn't walk or sort its steps.
+    """
+    __slots__ = ("name", "offsets", "actions", "keys", "names", "ends", "batches", "length")
+
+    def __init__(self, name, offsets, actions, keys, names, ends):
+        self.name = name
+        self.offsets = offsets
+        self.actions = actions
+        self.keys = keys
+        self.names = names
+        self.ends = ends  # Step g covers actions ends[g - 1]:ends[g]
+        starts = (0,) + tuple(ends[:-1])
+        self.batches = tuple(tuple(zip(actions[a:b], keys[a:b])) for a, b in zip(starts, ends))
+        self.length = offsets[-1] if offsets else 0.0
+
+    @classmethod
+    def compile(cls, macro, resolve=None):
+        entries = []
+        for step in macro.get("steps", []):
+            name = step.get("key")
+            if not name:
+                continue
+            delay = float(step.get("delay") or 0)
+            duration = float(step.get("duration") or 0)
+            name = sys.intern(name)
+            key = resolve(name) if resolve is not None else name
+            entries.append((delay, PRESS, key, name))
+            entries.append((delay + duration, RELEASE, key, name))
+        entries.sort(key=lambda e: e[0])  # Stable: a zero-length press stays before its release
+
+        offsets = array("d")
+        ends = []
+        for i, entry in enumerate(entries):
+            if offsets and entry[0] == offsets[-1]:
+                ends[-1] = i + 1
+            else:
+                offsets.append(entry[0])
+                ends.append(i + 1)
+
+        return cls(
+            macro.get("name", ""),
+            offsets,
+            bytes(e[1] for e in entries),
+            tuple(e[2] for e in entries),
+            tuple(e[3] for e in entries),
+            tuple(ends),
+        )
+
+    def held_after(self, count):
+        """Keys left down after the first count steps, e.g. when a run is cancelled."""
+        done = self.ends[min(count, len(self.ends)) - 1] if count > 0 and self.ends else 0
+        held = {}
+        for i in range(done):
+            if self.actions[i] == PRESS:
+                held[self.names[i]] = self.keys[i]
+            else:
+                held.pop(self.names[i], None)
+        return list(held.values())
+
+    def __len__(self):
+        return len(self.offsets)
@@ -1,11 +1,23 @@
+import asyncio
 import threading
-import json
 import socket
-import queue
 import sys
+import time
 import traceback
 from PyQt5 import QtCore
 
+import codec
+
+from components.CaptureFile import CaptureWriter
+from components.ConnectionStats import ConnectionStats
+from components.DeviceRegistry import DeviceRegistry
+from components.DiscoveryService import DiscoveryService
+from components.FrameBuffer import FrameBuffer
+from components.IngestQueue import IngestQueue
+from components.LatencyHistogram import PIPELINE
+from components.SequenceTracker import SequenceTracker
+from components.WireProtocol import BinaryDecoder, DEVICE, HELLO, is_binary_hello
+
 
 # === Global Exception Hook ===
 def handle_exception(exc_type, exc_value, exc_traceback):
@@ -17,6 +29,7 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 sys.excepthook = handle_exception
 
 
+
 # === Thread Safety Wrapper ===
 def safe_thread_wrapper(func):
     def wrapper(*args, **kwargs):
@@ -27,26 +40,264 @@ def safe_thread_wrapper(func):
     return wrapper
 
 
+def _stamp_received(event, read_time, read_wall):
+    """Latency stamps for the receive side of the pipeline (see LatencyHistogram.PIPELINE)."""
+    event["_t_recv"] = read_time
+    sent = event.get("event", {}).get("timestamp")
+    if sent and isinstance(sent, (int, float)) and not isinstance(sent, bool):
+        PIPELINE.record("wire", read_wall - sent)
+    t = time.perf_counter()
+    event["_t_enq"] = t
+    PIPELINE.record("decode", t - read_time)
+
+
+class _ClientProtocol(asyncio.BufferedProtocol):
+    """One broadcaster TCP connection, served by the receiver's event loop."""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.transport = None
+        self.addr = None
+        self.frames = FrameBuffer(receiver.max_frame_size)
+        self.mode = None  # "ndjson" or "binary", decided by the first bytes
+        self.decoder = None
+        self.stats = None
+        self._read_events = 0  # Events enqueued from the current read
+        self._read_time = 0.0  # perf_counter() / time.time() of the current read
+        self._read_wall = 0.0
+        self._device = None  # Last NDJSON device descriptor and its identity
+        self._identity = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.addr = transport.get_extra_info("peername")
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats = self.receiver._new_connection_stats(self.addr, "tcp")
+        self.receiver.active_clients[self.addr] = self
+        print(f"[RawInputReceiver] Client connected: {self.addr}")
+        self.receiver.status_signal.emit(f"Broadcaster {self.addr[0]} connected.")
+
+    def get_buffer(self, sizehint):
+        return self.frames.get_buffer()
+
+    def buffer_updated(self, nbytes):
+        self._read_time = time.perf_counter()
+        self._read_wall = time.time()
+        self._consume(nbytes)
+        self.stats.record(nbytes, self._read_events, self.receiver.event_queue.qsize())
+        self._read_events = 0
+
+    def _consume(self, nbytes):
+        if self.mode is None:
+            self.frames.advance(nbytes)
+            nbytes = 0
+            binary = is_binary_hello(self.frames.peek(HELLO.size))
+            if binary is None:
+                return
+            self.mode = "binary" if binary else "ndjson"
+            if binary:
+                self.decoder = BinaryDecoder(self.receiver.devices, self.transport.write,
+                                             self._enqueue,
+                                             self.receiver.max_frame_size - DEVICE.size)
+            print(f"[RawInputReceiver] {self.addr} speaks {self.mode}")
+
+        if self.mode == "binary":
+            try:
+                self.frames.commit_records(nbytes, self.decoder.parse)
+            except (ValueError, UnicodeDecodeError) as e:
+                print(f"[Binary Protocol] {self.addr}: {e}; closing connection.")
+                self.transport.close()
+            return
+
+        oversized = self.frames.oversized_frames
+        self.frames.commit(nbytes, self._on_frame)
+        if self.frames.oversized_frames != oversized:
+            print(f"[RawInputReceiver] Dropped frame over {self.receiver.max_frame_size} bytes from {self.addr}")
+
+    def _on_frame(self, frame):
+        try:
+            event = codec.loads(frame)
+        except codec.DecodeError:
+            if bytes(frame).strip():
+                self.stats.json_errors += 1
+                print(f"[JSON Error] {bytes(frame[:200])!r}")
+            return
+        if not isinstance(event, dict) or not isinstance(event.get("event", {}), dict):
+            self.stats.json_errors += 1
+            print(f"[JSON Error] Not an event object: {bytes(frame[:200])!r}")
+            return
+        self._enqueue(event)
+
+    def _enqueue(self, event):
+        self._read_events += 1
+        if self.decoder is None:  # Binary events come with theirs
+            # A broadcaster repeats the same descriptor, so resolve it only when it changes
+            device = event.get("device") or {}
+            if device != self._device:
+                self._device = device
+                self._identity = self.receiver.devices.identity(device)
+            event["_device"] = self._identity
+        if PIPELINE.enabled:
+            _stamp_received(event, self._read_time, self._read_wall)
+        recorder = self.receiver.recorder
+        if recorder is not None:
+            recorder.write(event, self._read_time)
+        self.receiver.event_queue.put(event)
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            print(f"[Client Handler Error] {exc}")
+        self.receiver.active_clients.pop(self.addr, None)
+        self.receiver.closed_stats[self.addr[0]] = self.stats
+        print(f"[RawInputReceiver] Client {self.addr} disconnected.")
+        self.receiver.status_signal.emit(f"Broadcaster {self.addr[0]} disconnected.")
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Answers UDP discovery requests from broadcasters looking for the host."""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        service = self.receiver.discovery
+        if not service.allow(addr[0]):
+            return  # Flooding source
+        try:
+            req = codec.loads(data)
+            if req.get("type") == "discovery_request":
+                self.transport.sendto(service.response_for(addr[0]), addr)
+        except Exception as e:
+            print(f"[Discovery Loop Error] {e}")
+
+    def error_received(self, exc):
+        print(f"[Discovery Loop Error] {exc}")
+
+
+class _EventDatagramProtocol(asyncio.DatagramProtocol):
+    """
+    UDP event transport. Each datagram is one JSON event, or a small batch:
+        {"device": {...}, "seq": n, "event": {...}}
+        {"device": {...}, "seq": n, "events": [{...}, ...]}   (events numbered n, n+1, ...)
+    Sequence numbers are per broadcaster device; duplicates are dropped.
+    """
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        stats = self.receiver.udp_sources.get(addr[0])
+        if stats is None:
+            stats = self.receiver.udp_sources[addr[0]] = self.receiver._new_connection_stats(addr, "udp")
+        try:
+            msg = codec.loads(data)
+        except codec.DecodeError:
+            stats.json_errors += 1
+            stats.record(len(data), 0, self.receiver.event_queue.qsize())
+            print(f"[UDP JSON Error] {data[:200]!r} from {addr}")
+            return
+
+        if isinstance(msg, dict):
+            device = msg.get("device") or {}
+            seq = msg.get("seq")
+            events = msg.get("events")
+            if events is None:
+                events = [msg.get("event") or {}]
+        if (not isinstance(msg, dict) or not isinstance(device, dict) or not isinstance(events, list)
+                or (seq is not None and (not isinstance(seq, int) or isinstance(seq, bool)))):
+            stats.json_errors += 1
+            stats.record(len(data), 0, self.receiver.event_queue.qsize())
+            print(f"[UDP JSON Error] Malformed datagram {data[:200]!r} from {addr}")
+            return
+
+        tracker = None
+        if seq is not None:
+            key = (addr[0],) + DeviceRegistry.descriptor_key(device)
+            tracker = self.receiver.udp_streams.get(key)
+            if tracker is None:
+                tracker = self.receiver.udp_streams[key] = SequenceTracker()
+
+        identity = self.receiver.devices.identity(device)
+        put = self.receiver.event_queue.put
+        recorder = self.receiver.recorder
+        stamp = PIPELINE.enabled
+        read_time, read_wall = time.perf_counter(), time.time()
+        accepted = 0
+        for i, event in enumerate(events):
+            if tracker is not None and not tracker.accept(seq + i):
+                continue  # Retransmitted press/release we already have
+            if not isinstance(event, dict):
+                stats.json_errors += 1
+                continue
+            event = {"device": device, "event": event, "_device": identity}
+            if stamp:
+                _stamp_received(event, read_time, read_wall)
+            if recorder is not None:
+                recorder.write(event, read_time)
+            put(event)
+            accepted += 1
+        stats.record(len(data), accepted, self.receiver.event_queue.qsize())
+
+    def error_received(self, exc):
+        print(f"[UDP Event Error] {exc}")
+
+
 class RawInputReceiver(QtCore.QObject):
     """
     Multi-client TCP server + UDP discovery responder.
+    All sockets are served by a single asyncio event loop thread;
+    clients may speak NDJSON or the binary format in WireProtocol.
+    With udp_events=True, key events are also accepted as UDP datagrams on listen_port.
     Safely communicates with PyQt using signals.
     """
     raw_input_signal = QtCore.pyqtSignal(dict)  # Emits parsed events to main thread
+    raw_input_batch_signal = QtCore.pyqtSignal(object)  # List of events; object avoids QVariant conversion
     status_signal = QtCore.pyqtSignal(str)  # ✅ NEW
-    def __init__(self, listen_port=5005, discovery_port=5006):
+    def __init__(self, listen_port=5005, discovery_port=5006, max_frame_size=64 * 1024, udp_events=False,
+                 queue_size=4096, overflow_policy="drop_oldest", discovery_multicast_group=None,
+                 stats_interval=5.0, flood_threshold=500.0):
         super().__init__()
         self.listen_port = listen_port
         self.discovery_port = discovery_port
+        self.udp_events = udp_events
+        self.max_frame_size = max_frame_size  # Longest accepted NDJSON line, in bytes
         self.server_socket = None
         self.discovery_socket = None
-        self.active_clients = {}
+        self.udp_event_socket = None
+        self.udp_streams = {}  # (ip, vid, pid, product_name) -> SequenceTracker
+        self.active_clients = {}  # addr -> _ClientProtocol (only touched on the loop thread)
+        self.closed_stats = {}  # ip -> ConnectionStats of its last closed TCP connection
+        self.udp_sources = {}  # ip -> ConnectionStats for UDP event traffic
+        self._connect_counts = {}  # ip -> TCP connections seen
+        self.stats_interval = stats_interval
+        self.flood_threshold = flood_threshold  # events/s over 10 s that gets reported
         self._running = False
-        self.event_queue = queue.Queue()
-
-        self.server_thread = None
-        self.discovery_thread = None
+        self.event_queue = IngestQueue(queue_size, overflow_policy)
+        self.devices = DeviceRegistry()  # Binary protocol device ids, shared by all clients
+        self.recorder = None  # CaptureWriter while recording; written on the loop thread
+        self.discovery = DiscoveryService(multicast_group=discovery_multicast_group)
+
+        self._loop = None
+        self._server = None
+        self._discovery_transport = None
+        self._udp_event_transport = None
+        self._discovery_refresh = None
+        self._stats_timer = None
+
+        self.loop_thread = None
         self.processor_thread = None
+        self.dispatch_handler = None  # Called on the processor thread instead of emitting to the GUI
+        self.dispatch_timeout = None  # Optional: seconds until dispatch_handler wants a wakeup
 
         print(f"[RawInputReceiver] Initialized on TCP {listen_port}, UDP {discovery_port}")
 
@@ -61,27 +312,41 @@ class RawInputReceiver(QtCore.QObject):
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.server_socket.bind(('', self.listen_port))
-            self.server_socket.listen(5)
+            self.server_socket.listen(64)
+            self.server_socket.setblocking(False)
+            self.listen_port = self.server_socket.getsockname()[1]
 
             # UDP discovery setup
             self.discovery_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.discovery_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.discovery_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
             self.discovery_socket.bind(('', self.discovery_port))
-            self.discovery_socket.settimeout(1.0)
+            self.discovery_socket.setblocking(False)
+            self.discovery_port = self.discovery_socket.getsockname()[1]
+            self.discovery.join_multicast(self.discovery_socket)
+
+            # UDP event transport setup (same port number as TCP)
+            if self.udp_events:
+                self.udp_event_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.udp_event_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.udp_event_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+                self.udp_event_socket.bind(('', self.listen_port))
+                self.udp_event_socket.setblocking(False)
+
+            # Selector loop on every platform (the Windows default is Proactor)
+            self._loop = asyncio.SelectorEventLoop()
+            self._loop.run_until_complete(self._open_endpoints())
 
             self._running = True
+            self.event_queue.reopen()
 
             # Threads
-            self.server_thread = threading.Thread(
-                target=safe_thread_wrapper(self._server_loop), daemon=True)
-            self.discovery_thread = threading.Thread(
-                target=safe_thread_wrapper(self._discovery_listener_loop), daemon=True)
+            self.loop_thread = threading.Thread(
+                target=safe_thread_wrapper(self._run_loop), daemon=True)
             self.processor_thread = threading.Thread(
-                target=safe_thread_wrapper(self._process_events_loop), daemon=True)
+                target=safe_thread_wrapper(self._process_events_loop), name="RawInputDispatch", daemon=True)
 
-            self.server_thread.start()
-            self.discovery_thread.start()
+            self.loop_thread.start()
             self.processor_thread.start()
 
             print("[RawInputReceiver] Server started successfully.")
@@ -89,129 +354,225 @@ class RawInputReceiver(QtCore.QObject):
         except Exception as e:
             print(f"[RawInputReceiver] Startup Error: {e}\n{traceback.format_exc()}")
             self._running = False
+            self._close_sockets()
 
     def stop(self):
         print("[RawInputReceiver] Stopping...")
+        was_running = self._running
         self._running = False
 
-        # Close clients
-        for addr, (conn, _) in list(self.active_clients.items()):
-            try:
-                conn.shutdown(socket.SHUT_RDWR)
-                conn.close()
-            except:
-                pass
-            self.active_clients.pop(addr, None)
-
-        # Close sockets
-        if self.server_socket:
-            try:
-                self.server_socket.shutdown(socket.SHUT_RDWR)
-                self.server_socket.close()
-            except:
-                pass
-            self.server_socket = None
-
-        if self.discovery_socket:
+        self.event_queue.close()  # Wake the processor thread
+        if was_running and self._loop is not None:
             try:
-                self.discovery_socket.close()
-            except:
-                pass
-            self.discovery_socket = None
+                self._loop.call_soon_threadsafe(self._shutdown_endpoints)
+            except RuntimeError:
+                pass  # Loop already closed
 
         print("[RawInputReceiver] Waiting for threads to exit...")
-        for t in [self.server_thread, self.discovery_thread, self.processor_thread]:
+        for t in [self.loop_thread, self.processor_thread]:
             if t and t.is_alive():
                 t.join(timeout=2)
 
+        self._close_sockets()
+        self.stop_recording()
         print("[RawInputReceiver] Stopped.")
 
-    # === Internal Threads ===
-    def _server_loop(self):
-        while self._running:
-            try:
-                self.server_socket.settimeout(1.0)
-                conn, addr = self.server_socket.accept()
-                print(f"[RawInputReceiver] Client connected: {addr}")
-
-                t = threading.Thread(
-                    target=safe_thread_wrapper(self._handle_client),
-                    args=(conn, addr),
-                    daemon=True
-                )
-                self.active_clients[addr] = (conn, t)
-                t.start()
-
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"[Server Loop Error] {e}\n{traceback.format_exc()}")
+    # === Event Loop ===
+    async def _open_endpoints(self):
+        self._server = await self._loop.create_server(
+            lambda: _ClientProtocol(self), sock=self.server_socket)
+        self._discovery_transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _DiscoveryProtocol(self), sock=self.discovery_socket)
+        self._discovery_refresh = self._loop.call_later(
+            self.discovery.refresh_interval, self._refresh_discovery)
+        if self.stats_interval:
+            self._stats_timer = self._loop.call_later(self.stats_interval, self._check_stats)
+        if self.udp_event_socket is not None:
+            self._udp_event_transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _EventDatagramProtocol(self), sock=self.udp_event_socket)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    def _refresh_discovery(self):
+        # Runs on the loop thread; picks up NICs that came and went. Enumerating
+        # them can block on name lookups, so that part runs in the executor.
+        self._discovery_refresh = None
+        scan = self._loop.run_in_executor(None, DiscoveryService.enumerate_interfaces)
+        scan.add_done_callback(self._discovery_scanned)
+
+    def _discovery_scanned(self, scan):
+        # Loop thread, once the executor has the new interface table
+        if self._server is None or scan.cancelled():
+            return  # Shutting down
+        try:
+            self.discovery.refresh(scan.result())
+            if self.discovery_socket is not None:
+                self.discovery.join_multicast(self.discovery_socket)
+        except Exception as e:
+            print(f"[Discovery] Interface refresh failed: {e}")
+        self._discovery_refresh = self._loop.call_later(
+            self.discovery.refresh_interval, self._refresh_discovery)
 
-    def _handle_client(self, conn, addr):
-        buffer = ""
-        conn.settimeout(1.0)
-        while self._running:
-            try:
-                data = conn.recv(4096)
-                if not data:
-                    break
-
-                buffer += data.decode()
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if line.strip():
-                        try:
-                            event = json.loads(line)
-                            self.event_queue.put(event)
-                        except json.JSONDecodeError:
-                            print(f"[JSON Error] {line}")
-
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"[Client Handler Error] {e}\n{traceback.format_exc()}")
-                break
+    def _check_stats(self):
+        # Runs on the loop thread; points at broadcasters flooding the host
+        try:
+            for stats in self._all_stats():
+                rate = stats.rate(10)
+                if rate > self.flood_threshold:
+                    self.status_signal.emit(
+                        f"Broadcaster {stats.addr[0]} ({stats.transport}) is sending {rate:.0f} events/s.")
+        except Exception as e:
+            print(f"[RawInputReceiver] Stats check failed: {e}")
+        self._stats_timer = self._loop.call_later(self.stats_interval, self._check_stats)
+
+    def _shutdown_endpoints(self):
+        # Runs on the loop thread
+        for timer in [self._discovery_refresh, self._stats_timer]:
+            if timer is not None:
+                timer.cancel()
+        self._discovery_refresh = None
+        self._stats_timer = None
+
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+        for addr, client in list(self.active_clients.items()):
+            client.close()
+            self.active_clients.pop(addr, None)
 
-        conn.close()
-        self.active_clients.pop(addr, None)
-        print(f"[RawInputReceiver] Client {addr} disconnected.")
+        if self._discovery_transport is not None:
+            self._discovery_transport.close()
+            self._discovery_transport = None
 
-    def _discovery_listener_loop(self):
-        while self._running:
-            try:
-                data, addr = self.discovery_socket.recvfrom(1024)
-                req = json.loads(data.decode())
-                if req.get("type") == "discovery_request":
-                    response = json.dumps({
-                        "type": "discovery_response",
-                        "sender": "windows_macro_app",
-                        "ip_address": self._get_local_ip()
-                    }).encode()
-                    self.discovery_socket.sendto(response, addr)
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"[Discovery Loop Error] {e}")
+        if self._udp_event_transport is not None:
+            self._udp_event_transport.close()
+            self._udp_event_transport = None
+
+        # Let transports deliver connection_lost before the loop stops
+        self._loop.call_soon(self._loop.stop)
 
+    def _close_sockets(self):
+        for sock in [self.server_socket, self.discovery_socket, self.udp_event_socket]:
+            if sock:
+                try:
+                    sock.close()
+                except:
+                    pass
+        self.server_socket = None
+        self.discovery_socket = None
+        self.udp_event_socket = None
+
+    # === Internal Threads ===
     def _process_events_loop(self):
+        # Block until something arrives, then take everything already queued so a
+        # burst costs one cross-thread signal instead of one per event.
         while self._running:
-            try:
-                event = self.event_queue.get(timeout=0.1)
-                self.raw_input_signal.emit(event)  # Safe emit
-                self.event_queue.task_done()
-            except queue.Empty:
+            next_timeout = self.dispatch_timeout
+            batch = self.event_queue.get_batch(next_timeout() if next_timeout is not None else None)
+            if batch is None:
+                break
+            if not batch:
+                # Woken for a deadline the handler asked for
+                if self.dispatch_handler is not None:
+                    self._call_dispatch_handler(batch)
                 continue
 
-    def _get_local_ip(self):
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if PIPELINE.enabled:
+                t = time.perf_counter()
+                for event in batch:
+                    enqueued = event.get("_t_enq")
+                    if enqueued is not None:
+                        PIPELINE.record("queue", t - enqueued)
+                    event["_t_deq"] = t
+
+            if self.dispatch_handler is not None:
+                self._call_dispatch_handler(batch)
+            else:
+                self.raw_input_batch_signal.emit(batch)
+            if self.receivers(self.raw_input_signal) > 0:
+                for event in batch:
+                    self.raw_input_signal.emit(event)
+
+    def start_recording(self, path):
+        """Stream every incoming event, with its receive time, to a capture file."""
+        self.stop_recording()
+        self.recorder = CaptureWriter(path)
+        print(f"[RawInputReceiver] Recording input to {path}")
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return 0
+        if self._running and self._loop is not None and not self._loop.is_closed():
+            # Close on the loop thread so a write in progress finishes first
+            self._loop.call_soon_threadsafe(recorder.close)
+        else:
+            recorder.close()
+        print(f"[RawInputReceiver] Recorded {recorder.events} events to {recorder.path}")
+        return recorder.events
+
+    def _call_dispatch_handler(self, batch):
         try:
-            s.connect(('8.8.8.8', 1))
-            ip = s.getsockname()[0]
-        except:
-            ip = '127.0.0.1'
-        finally:
-            s.close()
-        return ip
+            self.dispatch_handler(batch)
+        except Exception as e:
+            print(f"[Dispatch Error] {e}\n{traceback.format_exc()}")
+
+    def set_dispatch_handler(self, handler, next_timeout=None):
+        """
+        Run handler(events) directly on the processor thread for every batch, so
+        matching and macro launch never wait on the GUI event loop. Pass None to
+        go back to emitting raw_input_batch_signal.
+        next_timeout() may return seconds until the handler wants to be called
+        again even if nothing arrives (it then gets an empty list), or None.
+        """
+        self.dispatch_handler = handler
+        self.dispatch_timeout = next_timeout
+
+    def _new_connection_stats(self, addr, transport):
+        reconnects = 0
+        if transport == "tcp":
+            count = self._connect_counts.get(addr[0], 0) + 1
+            self._connect_counts[addr[0]] = count
+            reconnects = count - 1
+        return ConnectionStats(addr, transport, reconnects)
+
+    def _all_stats(self):
+        return [c.stats for c in list(self.active_clients.values())] + list(self.udp_sources.values())
+
+    def connection_stats(self, include_closed=False):
+        """Per-connection counters, busiest (10 s rate) first."""
+        stats = [dict(s.to_dict(), connected=True) for s in self._all_stats()]
+        if include_closed:
+            stats += [dict(s.to_dict(), connected=False) for s in list(self.closed_stats.values())]
+        stats.sort(key=lambda d: d["events_per_sec_10s"], reverse=True)
+        return stats
+
+    def report_stats(self):
+        """Emit a one-line summary of the busiest broadcasters on status_signal."""
+        top = self.connection_stats()[:3]
+        if not top:
+            self.status_signal.emit("No broadcasters connected.")
+            return
+        self.status_signal.emit("Busiest broadcasters: " + ", ".join(
+            f"{d['addr']} {d['events_per_sec_10s']:.0f} ev/s (q max {d['queue_depth_max']})" for d in top))
+
+    def queue_stats(self):
+        """Depth, coalesced and dropped counters of the ingest queue."""
+        return self.event_queue.stats()
+
+    def udp_stats(self):
+        """Loss/reorder/duplicate counters for every UDP event stream seen so far."""
+        return [
+            dict(tracker.to_dict(), addr=key[0], device={"vid": key[1], "pid": key[2], "product_name": key[3]})
+            for key, tracker in list(self.udp_streams.items())
+        ]
 
     def is_running(self):
         return self._running
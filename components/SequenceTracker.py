@@ -0,0 +1,69 @@
+class SequenceTracker:
+    """
+    Tracks one sender's sequence numbers over a sliding window and counts
+    loss, reordering and duplicates (retransmitted datagrams).
+    """
+    def __init__(self, window=1024):
+        self.window = window
+        self._mask = (1 << window) - 1
+        self.highest = None
+        self._first = None  # Seq the tracker (re)started at; nothing below it was counted lost
+        self._seen = 0  # Bit i set -> (highest - i) was received
+
+        self.received = 0
+        self.lost = 0  # Gaps not (yet) filled by a late datagram
+        self.reordered = 0
+        self.duplicates = 0
+        self.resets = 0  # Sender restarted its sequence
+
+    def accept(self, seq):
+        """Record seq; returns False if it is a duplicate that must be dropped."""
+        if self.highest is None:
+            self._restart(seq)
+            return True
+
+        if seq > self.highest:
+            gap = seq - self.highest
+            self.lost += gap - 1
+            if gap >= self.window:
+                self._seen = 1  # Everything remembered falls out of the window
+            else:
+                self._seen = ((self._seen << gap) | 1) & self._mask
+            self.highest = seq
+            self.received += 1
+            return True
+
+        offset = self.highest - seq
+        if offset >= self.window:
+            # Far behind anything we remember: the broadcaster restarted
+            self.resets += 1
+            self._restart(seq)
+            return True
+
+        bit = 1 << offset
+        if self._seen & bit:
+            self.duplicates += 1
+            return False
+
+        self._seen |= bit
+        if seq > self._first:
+            self.lost -= 1  # Fills a gap counted above
+        self.reordered += 1
+        self.received += 1
+        return True
+
+    def _restart(self, seq):
+        self.highest = seq
+        self._first = seq
+        self._seen = 1
+        self.received += 1
+
+    def to_dict(self):
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "resets": self.resets,
+            "highest_seq": self.highest,
+        }
@@ -0,0 +1,125 @@
+import threading
+import time
+
+OVERRUN_POLICIES = ("skip", "restart", "overlap")
+
+
+class _Turbo:
+    __slots__ = ("key", "label", "period", "launch", "t0", "tick", "run_id", "tick_id", "active",
+                 "fired", "skipped", "missed", "last_fire")
+
+    def __init__(self, key, label, period, launch, t0, run_id):
+        self.key = key
+        self.label = label
+        self.period = period
+        self.launch = launch
+        self.t0 = t0
+        self.tick = 0  # Index of the last deadline handled; deadline n is t0 + n * period
+        self.run_id = run_id
+        self.tick_id = None
+        self.active = True
+        self.fired = 1  # The caller fires the first run itself at t0
+        self.skipped = 0
+        self.missed = 0
+        self.last_fire = t0
+
+    def to_dict(self):
+        elapsed = self.last_fire - self.t0
+        return {
+            "configured_hz": 1.0 / self.period,
+            "achieved_hz": (self.fired - 1) / elapsed if self.fired > 1 and elapsed > 0 else 0.0,
+            "fired": self.fired,
+            "skipped": self.skipped,
+            "missed": self.missed,
+            "active": self.active,
+        }
+
+
+class TurboEngine:
+    """
+    Repeats a launch() callback while a turbo button is held, on the
+    MacroScheduler thread.
+
+    Repeat n is due at t0 + n * period on the scheduler's perf_counter() clock,
+    so the rate doesn't drift with the time a launch takes. If the scheduler
+    falls more than a period behind, the missed deadlines are counted and
+    dropped rather than fired in a burst. When the previous run is still going
+    at a deadline, the overrun policy decides:
+        "skip"     don't start another run (default; runs never pile up)
+        "restart"  cancel the previous run and start a new one
+        "overlap"  start another run alongside it
+    """
+
+    def __init__(self, scheduler, overrun="skip"):
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown turbo overrun policy '{overrun}' (use one of {OVERRUN_POLICIES})")
+        self.scheduler = scheduler
+        self.overrun = overrun
+        self._lock = threading.Lock()
+        self._turbos = {}  # key -> _Turbo
+        self._last = {}  # label -> _Turbo of the latest session, for stats
+
+    def start(self, key, period, launch, run_id=None, label=None):
+        """
+        Start repeating launch() every period seconds. The caller has already
+        made the first run (run_id) at this moment. launch() returns the run id
+        of the macro it started, or None.
+        """
+        self.stop(key)
+        period = max(period, 0.001)
+        turbo = _Turbo(key, label if label is not None else str(key), period, launch, time.perf_counter(), run_id)
+        with self._lock:
+            self._turbos[key] = turbo
+            self._last[turbo.label] = turbo
+            turbo.tick_id = self.scheduler.call_at(turbo.t0 + period, self._on_tick, turbo)
+
+    def stop(self, key):
+        with self._lock:
+            turbo = self._turbos.pop(key, None)
+            if turbo is None:
+                return False
+            turbo.active = False
+            tick_id = turbo.tick_id
+        if tick_id is not None:
+            self.scheduler.cancel(tick_id)
+        return True
+
+    def stop_all(self):
+        for key in list(self._turbos):
+            self.stop(key)
+
+    def _on_tick(self, turbo):
+        # Scheduler thread
+        if not turbo.active:
+            return
+        now = time.perf_counter()
+        period = turbo.period
+        tick = turbo.tick + 1
+        behind = int((now - (turbo.t0 + tick * period)) / period)
+        if behind > 0:
+            turbo.missed += behind
+            tick += behind
+        turbo.tick = tick
+
+        run_id = turbo.run_id
+        busy = run_id is not None and self.scheduler.is_active(run_id)
+        if busy and self.overrun == "skip":
+            turbo.skipped += 1
+        else:
+            if busy and self.overrun == "restart":
+                self.scheduler.cancel(run_id)
+            turbo.run_id = turbo.launch()
+            turbo.fired += 1
+            turbo.last_fire = now
+
+        with self._lock:
+            if turbo.active:
+                turbo.tick_id = self.scheduler.call_at(turbo.t0 + (tick + 1) * period, self._on_tick, turbo)
+
+    def active_count(self):
+        return len(self._turbos)
+
+    def stats(self):
+        """Per button label: configured vs achieved rate of the current or latest session."""
+        with self._lock:
+            return {label: turbo.to_dict() for label, turbo in self._last.items()}
@@ -1,3 +1,6 @@
+from components.MacroRunner import POLICIES as MACRO_POLICIES
+
+
 class VirtualButton:
     def __init__(self, name, start_row, start_col, row_span=1, col_span=1):
         self.name = name
@@ -8,6 +11,12 @@ class VirtualButton:
 
         self.mapped_key = None
 
+        # Multi-key trigger instead of mapped_key: keys pressed together ("chord")
+        # or one after another ("sequence"); window None uses the ChordEngine default
+        self.trigger_keys = None
+        self.trigger_mode = "chord"
+        self.trigger_window_ms = None
+
         # Legacy support (optional): still store vendor_id/product_id/serial_number
         self.mapped_device = None  # Dictionary with optional fields
 
@@ -20,6 +29,15 @@ class VirtualButton:
         self.turbo_enabled = False
         self.turbo_delay_ms = 100
 
+        # What a press does while this button's macro is still playing:
+        # "overlap", "queue" (up to macro_queue_limit), "restart" or "drop"
+        self.macro_policy = "overlap"
+        self.macro_queue_limit = 4
+
+        # Layer key instead of a macro: "switch", "toggle" or "hold" the named layer
+        self.layer_mode = "switch"
+        self.layer_target = None
+
     def to_dict(self):
         return {
             "name": self.name,
@@ -28,12 +46,19 @@ class VirtualButton:
             "row_span": self.row_span,
             "col_span": self.col_span,
             "mapped_key": self.mapped_key,
+            "trigger_keys": self.trigger_keys,
+            "trigger_mode": self.trigger_mode,
+            "trigger_window_ms": self.trigger_window_ms,
             "mapped_device": self.mapped_device,
             "device_path": self.device_path,
             "assigned_macro_id": self.assigned_macro_id,
             "assigned_macro_name": self.assigned_macro_name,
             "turbo_enabled": self.turbo_enabled,
             "turbo_delay_ms": self.turbo_delay_ms,
+            "macro_policy": self.macro_policy,
+            "macro_queue_limit": self.macro_queue_limit,
+            "layer_mode": self.layer_mode,
+            "layer_target": self.layer_target,
         }
 
     @staticmethod
@@ -46,18 +71,47 @@ class VirtualButton:
             d.get("col_span", 1)
         )
         vb.mapped_key = d.get("mapped_key")
+        vb.trigger_keys = d.get("trigger_keys") or None
+        if vb.trigger_keys and len(vb.trigger_keys) == 1:
+            # A one-key chord is an ordinary mapping; only mapped_key is dispatched
+            vb.mapped_key = vb.trigger_keys[0]
+            vb.trigger_keys = None
+        vb.trigger_mode = d.get("trigger_mode", "chord")
+        vb.trigger_window_ms = d.get("trigger_window_ms")
         vb.mapped_device = d.get("mapped_device")
         vb.device_path = d.get("device_path")
         vb.assigned_macro_id = d.get("assigned_macro_id")
         vb.assigned_macro_name = d.get("assigned_macro_name")
         vb.turbo_enabled = d.get("turbo_enabled", False)
         vb.turbo_delay_ms = d.get("turbo_delay_ms", 100)
+        vb.set_macro_policy(d.get("macro_policy", "overlap"), d.get("macro_queue_limit", 4))
+        vb.layer_mode = d.get("layer_mode", "switch")
+        vb.layer_target = d.get("layer_target")
         return vb
 
+    def set_macro_policy(self, policy, queue_limit=None):
+        """Assign the execution policy; unknown policies fall back to "overlap" with a warning."""
+        if policy not in MACRO_POLICIES:
+            print(f"[VirtualButton] '{self.name}': unknown macro policy {policy!r}, using 'overlap'")
+            policy = "overlap"
+        self.macro_policy = policy
+        if queue_limit is not None:
+            try:
+                self.macro_queue_limit = max(1, int(queue_limit))
+            except (TypeError, ValueError):
+                print(f"[VirtualButton] '{self.name}': invalid macro queue limit {queue_limit!r}, using 4")
+                self.macro_queue_limit = 4
+
     def contains(self, row, col):
         return (self.start_row <= row < self.start_row + self.row_span) and \
                (self.start_col <= col < self.start_col + self.col_span)
 
+    def describe_trigger(self):
+        """e.g. "kp_1", "kp_1+kp_2" (chord) or "kp_0 > kp_5" (sequence)."""
+        if self.trigger_keys:
+            return (" > " if self.trigger_mode == "sequence" else "+").join(self.trigger_keys)
+        return self.mapped_key
+
     def set_mapped_device_path(self, path):
         """Set device path from raw input event (C# side)."""
         self.device_path = path
@@ -0,0 +1,166 @@
+"""
+Compact binary wire format for broadcasters (version 1).
+
+A client opts in by sending HELLO as its very first bytes; anything else is
+treated as NDJSON, so existing broadcasters keep working. After the host
+echoes HELLO, the client registers each device once and names each key code
+once, then streams fixed-size EVENT records:
+
+    HELLO        "NPB" + u8 version                        (both directions)
+    DEVICE       u8 0x01, u16 token, u16 len, JSON descriptor  -> DEVICE_ACK
+    DEVICE_ACK   u8 0x81, u16 token, u16 device_id         (host -> client)
+    KEY          u8 0x02, u16 key_code, u8 len, utf-8 key name
+    EVENT        u8 0x10, u16 device_id, u16 key_code, u8 action, f64 timestamp
+
+All integers are little-endian.
+"""
+import struct
+
+import codec
+
+MAGIC = b"NPB"
+VERSION = 1
+
+HELLO = struct.Struct("<3sB")
+DEVICE = struct.Struct("<BHH")
+DEVICE_ACK = struct.Struct("<BHH")
+KEY = struct.Struct("<BHB")
+EVENT = struct.Struct("<BHHBd")
+
+MSG_DEVICE = 0x01
+MSG_KEY = 0x02
+MSG_EVENT = 0x10
+MSG_DEVICE_ACK = 0x81
+
+ACTIONS = ("press", "release", "hold", "move")
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def is_binary_hello(prefix):
+    """True/False once enough bytes are known, None while still ambiguous."""
+    if not prefix:
+        return None
+    if prefix[0] != MAGIC[0]:
+        return False
+    if len(prefix) < HELLO.size:
+        return None
+    return bytes(prefix[:len(MAGIC)]) == MAGIC
+
+
+class BinaryDecoder:
+    """Per-connection decoder; turns records back into the NDJSON event dict shape."""
+
+    def __init__(self, registry, write, on_event, max_payload=64 * 1024):
+        self.registry = registry
+        self.write = write
+        self.on_event = on_event
+        self.max_payload = max_payload
+        self.version = None
+        self.devices = {}  # device_id -> shared device dict
+        self.identities = {}  # device_id -> (device path, display name)
+        self.keys = {}  # key_code -> key name
+
+    def parse(self, buf, start, end):
+        """Consume every complete record in buf[start:end]; returns the new start."""
+        if self.version is None:
+            if end - start < HELLO.size:
+                return start
+            magic, version = HELLO.unpack_from(buf, start)
+            if magic != MAGIC or version < 1:
+                raise ProtocolError(f"bad hello {magic!r} v{version}")
+            self.version = min(version, VERSION)
+            self.write(HELLO.pack(MAGIC, self.version))
+            start += HELLO.size
+
+        event_size = EVENT.size
+        unpack_event = EVENT.unpack_from
+        while start < end:
+            msg_type = buf[start]
+
+            if msg_type == MSG_EVENT:
+                if end - start < event_size:
+                    break
+                _, device_id, key_code, action, timestamp = unpack_event(buf, start)
+                start += event_size
+                device = self.devices.get(device_id)
+                key = self.keys.get(key_code)
+                if device is None or key is None or action >= len(ACTIONS):
+                    print(f"[Binary Protocol] Dropped event for device {device_id}, key {key_code}")
+                    continue
+                self.on_event({
+                    "device": device,
+                    "event": {"keyname": key, "action": ACTIONS[action], "timestamp": timestamp},
+                    "_device": self.identities[device_id],
+                })
+
+            elif msg_type == MSG_KEY:
+                if end - start < KEY.size:
+                    break
+                _, key_code, length = KEY.unpack_from(buf, start)
+                if end - start < KEY.size + length:
+                    break
+                body = start + KEY.size
+                self.keys[key_code] = bytes(buf[body:body + length]).decode("utf-8")
+                start = body + length
+
+            elif msg_type == MSG_DEVICE:
+                if end - start < DEVICE.size:
+                    break
+                _, token, length = DEVICE.unpack_from(buf, start)
+                if length > self.max_payload:
+                    raise ProtocolError(f"device descriptor of {length} bytes")
+                if end - start < DEVICE.size + length:
+                    break
+                body = start + DEVICE.size
+                descriptor = codec.loads(memoryview(buf)[body:body + length])
+                device_id = self.registry.register(descriptor)
+                self.devices[device_id] = self.registry.get(device_id)
+                self.identities[device_id] = self.registry.identity(self.devices[device_id])
+                self.write(DEVICE_ACK.pack(MSG_DEVICE_ACK, token, device_id))
+                start = body + length
+
+            else:
+                raise ProtocolError(f"unknown record type 0x{msg_type:02x}")
+
+        return start
+
+
+class BinaryEncoder:
+    """Client side of the protocol, for broadcasters, tools and benchmarks."""
+
+    def __init__(self):
+        self._key_codes = {}
+
+    @staticmethod
+    def hello():
+        return HELLO.pack(MAGIC, VERSION)
+
+    @staticmethod
+    def device(token, descriptor):
+        body = codec.dumps(descriptor)
+        return DEVICE.pack(MSG_DEVICE, token, len(body)) + body
+
+    @staticmethod
+    def read_device_ack(data):
+        msg_type, token, device_id = DEVICE_ACK.unpack_from(data)
+        if msg_type != MSG_DEVICE_ACK:
+            raise ProtocolError(f"expected DEVICE_ACK, got 0x{msg_type:02x}")
+        return token, device_id
+
+    def key(self, key_name):
+        """Returns (key_code, bytes to send); bytes is empty once the key is declared."""
+        code = self._key_codes.get(key_name)
+        if code is not None:
+            return code, b""
+        code = len(self._key_codes)
+        self._key_codes[key_name] = code
+        name = key_name.encode("utf-8")
+        return code, KEY.pack(MSG_KEY, code, len(name)) + name
+
+    @staticmethod
+    def event(device_id, key_code, action, timestamp):
+        return EVENT.pack(MSG_EVENT, device_id, key_code, ACTION_CODES[action], timestamp)
@@ -0,0 +1 @@
+# Lets pytest import the app packages (components, logic, ...) from the repo root
@@ -12,5 +12,6 @@ MACRO_FILE = Path("data/macros.json")
 LISTENER_FILE = Path("RawInputListener/RawInputListener/bin/Debug/net8.0-windows/RawInputListener.exe")
 
 SETTINGS_FILE = Path("data/settings.json")
+CAPTURE_DIR = Path("data/captures/")
 
 UNIQUE_APP_ID = "NUMCRO123456"  # Must be unique per app
\ No newline at end of file
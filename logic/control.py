@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import QMessageBox, QInputDialog
 from components.VirtualButton import VirtualButton  # Adjust the import path if needed
 import logic.table as table_logic
 import logic.live as live_logic
+import logic.dispatch as dispatch_logic
 
 def adjust_zoom(parent, factor):
     parent.zoom_factor *= factor
@@ -11,6 +12,8 @@ def adjust_zoom(parent, factor):
 def unmap_physical_key(parent):
     if parent.selected_vb:
         parent.selected_vb.mapped_key = None
+        parent.selected_vb.trigger_keys = None
+        dispatch_logic.update_trigger(parent, parent.selected_vb)
         parent.key_name_label.setText("Key: None")
         table_logic.update_table(parent)
 
@@ -76,5 +79,6 @@ def delete_virtual_button(parent):
     for vb in parent.virtual_buttons:
         if row == vb.start_row and col == vb.start_col:
             parent.virtual_buttons.remove(vb)
+            dispatch_logic.remove_trigger(parent, vb)
             table_logic.update_table(parent)
             break
\ No newline at end of file
@@ -1,18 +1,36 @@
 from constants import SETTINGS_FILE
-import json
+import codec
+from components.IngestQueue import IngestQueue
+from components.TurboEngine import OVERRUN_POLICIES
+
+# setting -> (default, check); a hand-edited value that fails its check is replaced by the default
+SETTING_CHECKS = {
+    "turbo_overrun": ("skip", lambda v: v in OVERRUN_POLICIES),
+    "queue_overflow": ("drop_oldest", lambda v: v in IngestQueue.OVERFLOW_POLICIES),
+    "queue_size": (4096, lambda v: isinstance(v, int) and not isinstance(v, bool) and v > 0),
+    "max_macro_runs": (32, lambda v: isinstance(v, int) and not isinstance(v, bool) and v >= 1),
+}
 
 def load_settings(parent):
     try:
-        with open(SETTINGS_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        settings = codec.load_file(SETTINGS_FILE)
+    except (FileNotFoundError,) + codec.DecodeError:
+        return {}
+    if not isinstance(settings, dict):
+        print(f"[Settings] {SETTINGS_FILE} is not a settings object; using defaults")
         return {}
+    return validate_settings(settings)
+
+def validate_settings(settings):
+    """Replaces invalid values of the settings in SETTING_CHECKS with their defaults."""
+    for name, (default, check) in SETTING_CHECKS.items():
+        if name in settings and not check(settings[name]):
+            print(f"[Settings] Invalid {name} {settings[name]!r}; using {default!r}")
+            settings[name] = default
+    return settings
     
 def save_settings(parent):
     try:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(parent.settings, f, indent=2)
+        codec.dump_file(parent.settings, SETTINGS_FILE)
     except Exception as e:
         print(f"Failed to save settings: {e}")
-
-
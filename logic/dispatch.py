@@ -0,0 +1,24 @@
+"""Keeps the dispatch thread's lookup structures in step with the layout being edited."""
+
+
+def rebuild_triggers(parent, device_filtering=None):
+    """Layout loaded/cleared, grid resized or device filtering toggled (recompiles every layer)."""
+    layers = parent.layers
+    layers.base.virtual_buttons = parent.virtual_buttons
+    if device_filtering is None:
+        layers.base.rebuild()
+    else:
+        layers.set_device_filtering(device_filtering)
+
+
+def update_trigger(parent, vb):
+    """vb's key, chord/sequence or device mapping changed."""
+    base = parent.layers.base
+    base.index.update(vb)
+    base.chords.update(vb)
+
+
+def remove_trigger(parent, vb):
+    base = parent.layers.base
+    base.index.remove(vb)
+    base.chords.remove(vb)
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import codec
+from constants import CONFIG_FILE
+from components.VirtualButton import VirtualButton
+
+
+def preload_layers(parent, directory=CONFIG_FILE):
+    """
+    Compiles every layout in directory, except the one being edited (the base
+    layer), into a layer named after its file, e.g. data/layouts/media.json -> "media".
+    """
+    current = Path(parent.current_layout_file).resolve() if parent.current_layout_file else None
+    layouts = {}
+    for path in sorted(Path(directory).glob("*.json")):
+        if path.resolve() == current:
+            continue
+        try:
+            data = codec.load_file(path)
+            layouts[path.stem] = [VirtualButton.from_dict(d) for d in data.get("virtual_buttons", [])]
+        except Exception as e:
+            parent.log_message(f"Skipping layer '{path.name}': {e}")
+    parent.layers.replace_layers(layouts)
+    if layouts:
+        parent.log_message(f"Layers ready: {', '.join(parent.layers.names())}")
+
+
+def on_layer_changed(parent, name):
+    """GUI side of a layer key. The table keeps showing the layout being edited."""
+    parent.statusBar().showMessage(f"Active layer: {name}")
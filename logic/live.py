@@ -1,10 +1,11 @@
 import time
-import keyboard
-import threading
-import pywinusb.hid as hid
 
 import logic.table as table_logic
 import logic.macros as macro_logic
+import logic.dispatch as dispatch_logic
+from components.DeviceRegistry import DeviceRegistry
+from components.LatencyHistogram import PIPELINE
+from components.MacroTimeline import MacroTimeline, RELEASE
 
 def handle_key_press(parent, key_str):
     parent.log_message(f"Pressed key: {key_str}")
@@ -17,48 +18,140 @@ def handle_key_press(parent, key_str):
                 run_macro(macro_id)
                 parent.log_message(f"Macro '{macro['name']}' triggered by key '{key_str}'.")
 
-def run_macro(parent, macro_id):
-    if macro_id not in parent.macros:
-        return
-    macro = parent.macros[macro_id]
+def _fire_step(timeline, output):
+    batches, send = timeline.batches, output.send
+
+    def fire(step):
+        send(batches[step])
+    return fire
+
+
+def compile_macros(parent):
+    """
+    Compiles parent.macros into parent.macro_timelines for parent.key_output. Call
+    whenever macros are loaded or saved, or the output backend changes; the new
+    dict is swapped in whole for the dispatch thread.
+    """
+    output = parent.key_output
+    timelines = {}
+    for macro_id, macro in parent.macros.items():
+        try:
+            timeline = MacroTimeline.compile(macro, output.resolve)
+        except (TypeError, ValueError, AttributeError) as e:
+            print(f"[Macros] Skipping macro '{macro_id}': {e}")
+            continue
+        timelines[macro_id] = (timeline, _fire_step(timeline, output))
+    parent.macro_timelines = timelines
+
+
+def _macro_finished(run, cancelled):
+    parent, timeline, on_finish = run.context
+    if cancelled:
+        # Don't leave keys down when a run is cut short
+        held = timeline.held_after(run.cursor)
+        if held:
+            parent.key_output.send(tuple((RELEASE, key) for key in held))
+        parent.log_signal.emit(f"Macro '{timeline.name}' cancelled.")
+    else:
+        parent.log_signal.emit(f"Macro '{timeline.name}' executed.")
+    if on_finish is not None:
+        on_finish(run, cancelled)
+
+
+def run_macro(parent, macro_id, trigger_time=None, origin_time=None, on_finish=None):
+    """
+    Plays a compiled macro on parent.macro_scheduler and returns the run id (None
+    if the macro doesn't exist). trigger_time/origin_time are perf_counter()
+    stamps of the virtual button match and the socket receive; when given, the
+    first injection is recorded in the pipeline latency histograms. on_finish is
+    called as on_finish(run, cancelled) after the run ends.
+    """
+    compiled = parent.macro_timelines.get(macro_id)
+    if compiled is None:
+        return None
+    timeline, fire = compiled
+
+    if trigger_time is not None:
+        fire_step = fire
 
-    def macro_thread():
-        start_time = time.time()
+        def fire(i):
+            fire_step(i)
+            if i == 0:
+                injected = time.perf_counter()
+                PIPELINE.record("inject", injected - trigger_time)
+                if origin_time is not None:
+                    PIPELINE.record("total", injected - origin_time)
 
-        # Track all press/release events as (timestamp, action, key)
-        events = []
+    return parent.macro_scheduler.submit(timeline.offsets, fire, on_done=_macro_finished,
+                                         context=(parent, timeline, on_finish))
 
-        for step in macro.get("steps", []):
-            key = step.get("key")
-            delay = step.get("delay", 0)
-            duration = step.get("duration", 0)
 
-            if not key:
-                continue
+def play_macro(parent, vb, trigger_time=None, origin_time=None, policy=None):
+    """
+    Runs vb's macro under its execution policy (or policy) through
+    parent.macro_runner. Returns the run id, or None if the run was queued,
+    dropped or the macro doesn't exist.
+    """
+    macro_id = vb.assigned_macro_id
+    if macro_id not in parent.macro_timelines:
+        return None
+
+    def launch(on_done, queued):
+        # A queued run's wait isn't pipeline latency
+        if queued:
+            return run_macro(parent, macro_id, on_finish=on_done)
+        return run_macro(parent, macro_id, trigger_time, origin_time, on_done)
+
+    return parent.macro_runner.submit(vb, launch, policy or vb.macro_policy, vb.macro_queue_limit, vb.name)
+
+
+def on_raw_input_batch(parent, events):
+    """
+    Handles a batch of raw input events drained from the receiver in one go.
+    Events are processed in arrival order. Runs on the receiver's dispatch thread,
+    so anything that touches widgets must go through parent's signals.
+    """
+    # Layers reloaded on the GUI thread are swapped in here, between events
+    layer = parent.layers.apply_pending()
+    if layer is not None:
+        parent.layer_changed_signal.emit(layer.name)
+
+    for event in events:
+        on_raw_input(parent, event)
+
+    # Chords/sequences whose window ran out (events may be empty: a deadline wakeup)
+    expire_chords(parent)
+
 
-            press_time = start_time + delay
-            release_time = press_time + duration
+def expire_chords(parent, now=None):
+    """Settle chords/sequences in the active layer whose window has closed by now (perf_counter())."""
+    engine = parent.layers.active.chords
+    if engine.pending:
+        now = time.perf_counter() if now is None else now
+        for outcome in engine.expire(now):
+            apply_chord_outcome(parent, outcome, now)
 
-            events.append((press_time, "press", key))
-            events.append((release_time, "release", key))
 
-        # Sort all events by time
-        events.sort(key=lambda e: e[0])
+def flush_chords(parent):
+    """Settle every held-back chord/sequence key now, e.g. at the end of a replay."""
+    now = time.perf_counter()
+    for outcome in parent.layers.active.chords.flush(now):
+        apply_chord_outcome(parent, outcome, now)
 
-        for event_time, action, key in events:
-            now = time.time()
-            wait_time = event_time - now
-            if wait_time > 0:
-                time.sleep(wait_time)
 
-            if action == "press":
-                keyboard.press(key)
-            else:  # release
-                keyboard.release(key)
+def apply_captured_key(parent, vb, key, device_path_identifier, device_display_name):
+    """GUI-thread half of key mapping mode; called through key_captured_signal."""
+    vb.mapped_key = key
+    # Store the unique device identifier
+    vb.set_mapped_device_path(device_path_identifier)
 
-        parent.log_message(f"Macro '{macro.get('name','')}' executed.")
+    # Save the device name for debug/display purposes
+    vb.mapped_device = {"name": device_display_name} # Store the user-friendly name
+    dispatch_logic.update_trigger(parent, vb)
 
-    threading.Thread(target=macro_thread, daemon=True).start()
+    parent.update_info_label.emit(f"Mapped '{key}' from '{device_display_name}' to virtual button '{vb.name}'.")
+    macro_logic.update_macro_info(parent, vb)
+    parent.key_mapped_signal.emit()
 
 
 def on_raw_input(parent, event):
@@ -67,7 +160,11 @@ def on_raw_input(parent, event):
     Captures one key if mapping is active, otherwise runs turbo/macro logic as normal.
     """
 
-    print(event)
+    entry_time = time.perf_counter()
+    dequeued = event.get("_t_deq")
+    if dequeued is not None:
+        PIPELINE.record("handoff", entry_time - dequeued)
+
     # --- IMPORTANT: Adapt to the new JSON structure from Raspberry Pi ---
     # The Pi script sends: {"device": {...}, "event": {...}}
     # We need to extract data from the 'event' and 'device' sub-dictionaries.
@@ -78,17 +175,13 @@ def on_raw_input(parent, event):
     event_action = event_details.get("action") # This will be "press", "release", "hold", "move", etc.
 
     # Extract device details
-    device_info = event.get("device", {})
-    # For device_path, we need a unique identifier. A combination of VID, PID, and Product Name is good.
-    # If VID/PID are still null, just use product_name.
-    device_vid = device_info.get("vid", "unknown_vid")
-    device_pid = device_info.get("pid", "unknown_pid")
-    device_product_name = device_info.get("product_name", "Unknown Device").replace(" ", "_").replace("-", "_") # Sanitize for path-like use
-
-    # Create a unique device identifier string for mapping/filtering
-    # This will look like "046d_c077_Logitech_USB_Receiver" or "unknown_vid_unknown_pid_Unknown_Device"
-    device_path_identifier = f"{device_vid}_{device_pid}_{device_product_name}"
-    device_display_name = device_info.get("product_name", "Unknown Device") # For user-friendly display
+    # The receiver attaches the interned (device path, display name) it resolved
+    # once per descriptor; events from elsewhere (replay, tests) are resolved here.
+    # The path looks like "046d_c077_Logitech_USB_Receiver" or "unknown_vid_unknown_pid_Unknown_Device"
+    identity = event.get("_device")
+    if identity is None:
+        identity = DeviceRegistry.make_identity(event.get("device", {}))
+    device_path_identifier, device_display_name = identity
 
     # --- End of Adaptation ---
 
@@ -107,82 +200,123 @@ def on_raw_input(parent, event):
             parent.update_info_label.emit("Error: No virtual button selected for mapping.")
             return
 
-        vb.mapped_key = key
-        # Store the unique device identifier
-        vb.set_mapped_device_path(device_path_identifier)
-
-        # Save the device name for debug/display purposes
-        vb.mapped_device = {"name": device_display_name} # Store the user-friendly name
-
-        parent.update_info_label.emit(f"Mapped '{key}' from '{device_display_name}' to virtual button '{vb.name}'.")
         parent.mapping_target = None
-        # Assuming macro_logic.update_macro_info exists and is accessible
-        # You might need to adjust this call if macro_logic is not directly available
-        # or if it expects a different object.
-        # For now, assuming it's imported or passed correctly.
-        macro_logic.update_macro_info(parent, vb)
-        parent.key_mapped_signal.emit()
+        # Widgets are only touched on the GUI thread
+        parent.key_captured_signal.emit(vb, key, device_path_identifier, device_display_name)
         return
 
     # -- NORMAL LISTENING MODE --
-    if not hasattr(parent, "pressed_keys"):
-        parent.pressed_keys = set()
+    engine = parent.layers.active.chords
+    if not engine.active and not engine.pending and not engine.holding:
+        dispatch_key(parent, key, event_action, device_path_identifier, event, entry_time)
+        return
+
+    # Keys that can't begin a chord/sequence come straight back as "pass"
+    for outcome in engine.feed(device_path_identifier, key, event_action, event, entry_time):
+        apply_chord_outcome(parent, outcome, entry_time)
 
-    matched_vbs = []
-    for vb in parent.virtual_buttons:
-        if vb.mapped_key != key:
-            continue
 
-        # Device filtering based on the new unique identifier
-        if parent.settings.get("device_filtering", False):
-            if not vb.device_path: # If a VB has no device path mapped, it matches any device if filtering is off
-                continue # If filtering is on, and no device path is mapped, it won't match.
-            if vb.device_path != device_path_identifier: # Compare with the new unique identifier
-                continue
+def apply_chord_outcome(parent, outcome, entry_time):
+    kind, device_path = outcome[0], outcome[1]
+    if kind == "pass":
+        _, _, key, action, event = outcome
+        dispatch_key(parent, key, action, device_path, event, entry_time)
+    elif kind == "fire":
+        _, _, name, buttons, event = outcome
+        match_time = time.perf_counter()
+        PIPELINE.record("match", match_time - entry_time)
+        press_buttons(parent, (device_path, name), buttons, match_time, event.get("_t_recv"))
+    else:  # release
+        _, _, name, buttons = outcome
+        release_buttons(parent, (device_path, name))
 
-        matched_vbs.append(vb)
 
+def dispatch_key(parent, key, event_action, device_path_identifier, event, entry_time):
+    """Single-key triggers: one index lookup in the active layer, then press the matched buttons."""
+    # The same key on two pads is two different keys
+    pressed = (device_path_identifier, key)
+
+    # Use event_action ("press", "release") instead of "down"/"up"
+    if event_action == "release":
+        # Releases go to whatever the press matched, even if the layer changed since
+        release_buttons(parent, pressed)
+        return
+    if event_action != "press":
+        return
+
+    matched_vbs = parent.layers.active.index.lookup(key, device_path_identifier)
     if not matched_vbs:
         return
 
-    # Use event_action ("press", "release") instead of "down"/"up"
-    if event_action == "press":
-        if key in parent.pressed_keys:
-            return
-        parent.pressed_keys.add(key)
-
-        for vb in matched_vbs:
-            parent.highlight_signal.emit(vb, True)
-
-            if vb.turbo_enabled:
-                if not hasattr(parent, "turbo_threads"):
-                    parent.turbo_threads = {}
-
-                def turbo_runner(vb_obj, stop_event_obj): # Renamed args to avoid confusion with outer scope
-                    delay = vb_obj.turbo_delay_ms / 1000.0
-                    while not stop_event_obj.is_set():
-                        if vb_obj.assigned_macro_id:
-                            # Assuming run_macro is accessible
-                            run_macro(parent, vb_obj.assigned_macro_id)
-                        if stop_event_obj.wait(delay):
-                            break
-
-                stop_event = threading.Event()
-                thread = threading.Thread(target=turbo_runner, args=(vb, stop_event), daemon=True)
-                parent.turbo_threads[key] = (thread, stop_event)
-                thread.start()
-
-            elif vb.assigned_macro_id:
-                # Assuming run_macro is accessible
-                run_macro(parent, vb.assigned_macro_id)
-
-    elif event_action == "release":
-        if key in parent.pressed_keys:
-            parent.pressed_keys.remove(key)
-
-            for vb in matched_vbs:
-                parent.highlight_signal.emit(vb, False)
-
-            if hasattr(parent, "turbo_threads") and key in parent.turbo_threads:
-                thread, stop_event = parent.turbo_threads.pop(key)
-                stop_event.set()
\ No newline at end of file
+    match_time = time.perf_counter()
+    PIPELINE.record("match", match_time - entry_time)
+    press_buttons(parent, pressed, matched_vbs, match_time, event.get("_t_recv"))
+
+
+def press_buttons(parent, pressed, matched_vbs, match_time, origin_time):
+    """pressed is (device path, key or chord/sequence name)."""
+    if pressed in parent.pressed_keys:
+        return
+    parent.pressed_keys[pressed] = matched_vbs
+
+    for vb in matched_vbs:
+        parent.highlight_signal.emit(vb, True)
+
+        if vb.layer_target:
+            switch_layer(parent, vb, True)
+
+        elif vb.turbo_enabled and vb.assigned_macro_id:
+            # First run now, repeats on the turbo engine until the key is released.
+            # Repeats follow the turbo overrun policy; only the run cap applies to them.
+            run_id = play_macro(parent, vb, match_time, origin_time)
+            parent.turbo.start((pressed, vb), vb.turbo_delay_ms / 1000.0,
+                               lambda vb=vb: play_macro(parent, vb, policy="overlap"),
+                               run_id, vb.name)
+
+        elif vb.assigned_macro_id:
+            play_macro(parent, vb, match_time, origin_time)
+
+
+def release_buttons(parent, pressed):
+    matched_vbs = parent.pressed_keys.pop(pressed, None)
+    if matched_vbs is None:
+        return
+
+    for vb in matched_vbs:
+        parent.highlight_signal.emit(vb, False)
+        if vb.layer_target and vb.layer_mode == "hold":
+            switch_layer(parent, vb, False)
+        elif vb.turbo_enabled:
+            parent.turbo.stop((pressed, vb))
+
+
+def switch_layer(parent, vb, pressed):
+    """
+    Layer key: "switch" makes vb.layer_target the active layer, "toggle" flips
+    to it and back, "hold" keeps it active while the key is down. Runs on the
+    dispatch thread; only the compiled layer changes, the GUI follows through
+    layer_changed_signal.
+    """
+    layers = parent.layers
+    old = layers.active
+    # Keys held back for a chord in the old layer are settled there first
+    now = time.perf_counter()
+    for outcome in old.chords.flush(now):
+        apply_chord_outcome(parent, outcome, now)
+
+    if not pressed:
+        layers.pop(vb.layer_target)
+    elif vb.layer_mode == "hold":
+        layers.push(vb.layer_target)
+    elif vb.layer_mode == "toggle":
+        layers.toggle(vb.layer_target)
+    else:
+        layers.switch(vb.layer_target)
+
+    new = layers.active
+    if new is old:
+        if pressed and vb.layer_target not in layers.layers:
+            parent.log_signal.emit(f"Layer '{vb.layer_target}' is not loaded.")
+        return
+    old.chords.hand_over(new.chords)
+    parent.layer_changed_signal.emit(new.name)
@@ -1,15 +1,21 @@
 from constants import MACRO_FILE
-import json
+import codec
 from PyQt5.QtCore import Qt
 
 import logic.table as table_logic
+from components.MacroOptimizer import MacroOptimizer
 
 def load_macros(parent):
     if MACRO_FILE.exists():
-        return json.load(open(MACRO_FILE))
+        return codec.load_file(MACRO_FILE)
     return {}
 
 
+def make_optimizer(parent):
+    """The macro optimizer configured in settings (macro_merge_ms, macro_grid_ms)."""
+    return MacroOptimizer(parent.settings.get("macro_merge_ms", 1.0), parent.settings.get("macro_grid_ms"))
+
+
 def on_turbo_toggled(parent, state):
     if not parent.selected_vb:
         return
@@ -60,12 +66,12 @@ def assign_macro_to_selected(parent, index):
 
         item = parent.table.item(parent.selected_vb.start_row, parent.selected_vb.start_col)
         if item:
-            tip = f"Mapped: {parent.selected_vb.mapped_key or 'None'}\nMacro: {parent.selected_vb.assigned_macro_name or 'None'}"
+            tip = f"Mapped: {parent.selected_vb.describe_trigger() or 'None'}\nMacro: {parent.selected_vb.assigned_macro_name or 'None'}"
             item.setToolTip(tip)
 
 def update_macro_info(parent, vb):
     parent.selected_vb = vb
-    parent.key_name_label.setText(f"Key: {vb.mapped_key if vb.mapped_key else 'None'}")
+    parent.key_name_label.setText(f"Key: {vb.describe_trigger() or 'None'}")
     parent.device_label.setText(f"Device: {vb.mapped_device["name"] if vb.mapped_device else 'None'}")
     if vb.assigned_macro_id:
         idx = parent.macro_combo.findData(vb.assigned_macro_id)
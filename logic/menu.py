@@ -1,27 +1,73 @@
-from constants import SETTINGS_FILE, CONFIG_FILE, GRID_COLS, GRID_ROWS
-import json
+from constants import SETTINGS_FILE, CONFIG_FILE, CAPTURE_DIR, GRID_COLS, GRID_ROWS, MACRO_FILE
+import codec
 import os
+import time
 from components.StartupLayoutDialog import StartupLayoutDialog
 from PyQt5.QtWidgets import QFileDialog, QMessageBox  # <-- Add this line
 
 from components.VirtualButton import VirtualButton
 from components.MacroManager import MacroManager
+from components.LatencyHistogram import PIPELINE
 
 import logic.data as data_logic
 import logic.table as table_logic
 import logic.macros as macro_logic
+import logic.dispatch as dispatch_logic
+import logic.layers as layers_logic
+import logic.live as live_logic
 
 def on_device_filtering_toggled(parent, checked):
     parent.device_filtering_enabled = checked
     parent.settings["device_filtering"] = checked
+    dispatch_logic.rebuild_triggers(parent, checked)
     data_logic.save_settings(parent)
     status = "enabled" if checked else "disabled"
     parent.info_label.setText(f"Device filtering {status}.")
 
+def dump_latency_stats(parent):
+    parent.log_message("Input pipeline latency (ms):")
+    for line in PIPELINE.dump().splitlines():
+        parent.log_message(line)
+    print(PIPELINE.dump())
+
+    stats = parent.macro_scheduler.stats()
+    lateness = stats["lateness"]
+    line = (f"Macro scheduler: {stats['active_runs']} running, depth {stats['depth']} (max {stats['max_depth']}), "
+            f"lateness p50 {lateness['p50'] * 1e3:.3f} / p99 {lateness['p99'] * 1e3:.3f} / max {lateness['max'] * 1e3:.3f} ms")
+    parent.log_message(line)
+    print(line)
+
+    totals, buttons = parent.macro_runner.stats()
+    line = (f"Macro runs: {totals['running']} of max {totals['max_runs']} playing, {totals['queued']} queued, "
+            f"{totals['dropped']} dropped ({totals['capped']} at the cap), {totals['cancelled']} cancelled (restart)")
+    parent.log_message(line)
+    print(line)
+    for name, counts in buttons.items():
+        if counts["queued"] or counts["dropped"] or counts["cancelled"]:
+            line = (f"Button '{name}': {counts['started']} started, {counts['queued']} queued, "
+                    f"{counts['dropped']} dropped, {counts['cancelled']} cancelled")
+            parent.log_message(line)
+            print(line)
+
+    for name, turbo in parent.turbo.stats().items():
+        line = (f"Turbo '{name}': {turbo['achieved_hz']:.1f} of {turbo['configured_hz']:.1f} Hz, "
+                f"{turbo['fired']} runs, {turbo['skipped']} skipped (overrun), {turbo['missed']} missed")
+        parent.log_message(line)
+        print(line)
+
+def toggle_input_capture(parent, checked):
+    if checked:
+        CAPTURE_DIR.mkdir(parents=True, exist_ok=True)
+        path = CAPTURE_DIR / f"capture-{time.strftime('%Y%m%d-%H%M%S')}.npcap"
+        parent.receiver.start_recording(str(path))
+        parent.info_label.setText(f"Recording input to {path}")
+    else:
+        count = parent.receiver.stop_recording()
+        parent.info_label.setText(f"Input capture stopped ({count} events).")
+
 def load_layout_from_file(parent, path):
     try:
-        with open(path, "r") as f:
-            layout_data = json.load(f)
+        layout_data = codec.load_file(path)
         load_layout(parent, layout_data, path)  # Assuming this method already exists
         parent.info_label.setText(f"Loaded startup layout: {os.path.basename(path)}")
     except Exception as e:
@@ -54,6 +100,7 @@ def create_new_layout(parent):
     )
     if confirm == QMessageBox.Yes:
         parent.virtual_buttons = []  # Clear the layout
+        dispatch_logic.rebuild_triggers(parent)
         parent.current_layout_file = None  # Reset the file reference
         table_logic.clear_table_cells(parent)   # Clear the visual grid
         table_logic.update_table(parent)        # Refresh the UI
@@ -66,8 +113,8 @@ def _save_to_file(parent, file_path):
         "virtual_buttons": [vb.to_dict() for vb in parent.virtual_buttons]
     }
     try:
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=2)
+        codec.dump_file(data, file_path)
+        layers_logic.preload_layers(parent)
         parent.statusBar().showMessage(f"Layout saved to {file_path}", 3000)
     except Exception as e:
         QMessageBox.critical(parent, "Error Saving File", str(e))
@@ -80,9 +127,11 @@ def load_layout(parent, layout_data, file_path):
     parent.col_spinbox.setValue(cols)
 
     parent.virtual_buttons = [VirtualButton.from_dict(d) for d in layout_data.get("virtual_buttons", [])]
+    dispatch_logic.rebuild_triggers(parent)
     table_logic.update_table(parent)
     table_logic.update_grid_size(parent)
     parent.current_layout_file = file_path
+    layers_logic.preload_layers(parent)
     parent.statusBar().showMessage(f"Loaded layout from {file_path}", 3000)
 
 def open_layout(parent):
@@ -92,8 +141,7 @@ def open_layout(parent):
     )
     if file_path:
         try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
+            data = codec.load_file(file_path)
             load_layout(parent, data, file_path)
 
         except Exception as e:
@@ -115,8 +163,7 @@ def choose_startup_layout(parent):
 def get_startup_layout(parent):
     if SETTINGS_FILE.exists():
         try:
-            with SETTINGS_FILE.open("r") as f:
-                data = json.load(f)
+            data = codec.load_file(SETTINGS_FILE)
             print(f"[INFO] Loaded startup layout: {data.get('startup_layout')}")
             return data.get("startup_layout", None)
         except Exception as e:
@@ -131,9 +178,26 @@ def update_startup_menu_checkmark(parent):
     parent.choose_startup_action.setChecked(checked)
     parent.choose_startup_action.setCheckable(True)
 
+def _on_macros_saved(parent, macros):
+    # Recompile right away so edits apply while the dialog is still open
+    parent.macros = dict(macros)
+    live_logic.compile_macros(parent)
+
+def optimize_macros(parent):
+    """Runs the macro optimizer over every saved macro now."""
+    optimizer = macro_logic.make_optimizer(parent)
+    parent.macros, report = optimizer.optimize_all(parent.macros)
+    codec.dump_file(parent.macros, MACRO_FILE)
+    live_logic.compile_macros(parent)
+    parent.log_message(f"Macros optimized: {optimizer.describe(report)}")
+    parent.info_label.setText("Macros optimized.")
+
 def open_macro_manager(parent):
-    parent.macro_dialog = MacroManager(parent)
+    optimizer = macro_logic.make_optimizer(parent) if parent.settings.get("optimize_macros_on_save", True) else None
+    parent.macro_dialog = MacroManager(parent, optimizer)
     parent.macro_dialog.macros_deleted.connect(lambda: macro_logic.unmap_deleted_macros(parent))
+    parent.macro_dialog.macros_saved.connect(lambda macros: _on_macros_saved(parent, macros))
     parent.macro_dialog.exec_()
     parent.macros = parent.macro_dialog.load_macros()
+    live_logic.compile_macros(parent)
     macro_logic.refresh_macro_dropdown(parent)
\ No newline at end of file
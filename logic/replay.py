@@ -0,0 +1,60 @@
+import time
+
+from components.CaptureFile import CaptureReader
+import logic.live as live_logic
+
+
+def _expire_windows(parent, speed, next_due, last_offset, last_real, next_offset):
+    """
+    Closes the chord/sequence windows that would have run out before the next
+    captured event, as the receiver's deadline wakeups do live.
+    """
+    while True:
+        now = time.perf_counter()
+        timeout = parent.layers.active.chords.next_timeout(now)
+        if timeout is None:
+            return
+        deadline = now + timeout
+        if speed > 0:
+            if deadline >= next_due:
+                return
+            wait = deadline - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            live_logic.expire_chords(parent)
+        else:
+            # As fast as possible: the capture's clock stands in for the real one
+            if last_offset is None or last_offset + (deadline - last_real) >= next_offset:
+                return
+            live_logic.expire_chords(parent, deadline)
+
+
+def replay_capture(parent, path, speed=1.0, handler=None, stop_event=None):
+    """
+    Feeds a capture file back through live.on_raw_input_batch (or handler(events)),
+    one event per batch, closing chord/sequence windows at their deadlines between
+    events and flushing anything still held back at the end.
+    speed 1.0 replays in real time, 2.0 twice as fast, 0 as fast as possible.
+    Returns (events replayed, seconds taken).
+    """
+    if handler is None:
+        handler = lambda events: live_logic.on_raw_input_batch(parent, events)
+
+    count = 0
+    start = time.perf_counter()
+    last_offset = last_real = None
+    for offset, event in CaptureReader(path):
+        if stop_event is not None and stop_event.is_set():
+            break
+        due = start + offset / speed if speed > 0 else None
+        _expire_windows(parent, speed, due, last_offset, last_real, offset)
+        if speed > 0:
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        event["_t_recv"] = last_real = time.perf_counter()  # So the latency histograms see replayed events
+        last_offset = offset
+        handler([event])
+        count += 1
+    live_logic.flush_chords(parent)
+    return count, time.perf_counter() - start
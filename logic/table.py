@@ -4,6 +4,7 @@ from PyQt5.QtGui import QColor, QBrush
 from constants import CELL_SIZE
 
 import logic.macros as macro_logic
+import logic.dispatch as dispatch_logic
 
 def clear_table_cells(parent):
     for r in range(parent.table.rowCount()):
@@ -31,6 +32,7 @@ def update_grid_size(parent):
         vb for vb in parent.virtual_buttons
         if vb.start_row + vb.row_span <= rows and vb.start_col + vb.col_span <= cols
     ]
+    dispatch_logic.rebuild_triggers(parent)
 
     update_table(parent)
     update_table_size(parent)
@@ -44,7 +46,7 @@ def highlight_selected_virtual_button(parent, selected_vb):
         if item:
             if vb == selected_vb:
                 item.setBackground(QColor("#add8e6"))  # light blue = selected
-            elif vb.mapped_key:
+            elif vb.mapped_key or vb.trigger_keys:
                 item.setBackground(QColor("#fffacd"))  # light yellow = mapped
             else:
                 item.setBackground(QColor("white"))  # unselected and unmapped
@@ -110,7 +112,7 @@ def set_button_highlight(parent, vb, highlight_on):
     if highlight_on:
         item.setBackground(QBrush(QColor("#ffff00")))  # bright yellow
     else:
-        if vb.mapped_key:
+        if vb.mapped_key or vb.trigger_keys:
             item.setBackground(QBrush(QColor("#fffacd")))  # light yellow
         else:
             item.setBackground(QBrush(Qt.white))
@@ -129,10 +131,12 @@ def update_table(parent):
         parent.table.setSpan(vb.start_row, vb.start_col, vb.row_span, vb.col_span)
         item = QTableWidgetItem(vb.name)
         item.setTextAlignment(Qt.AlignCenter)
-        tip = f"Mapped: {vb.mapped_key or 'None'}\nMacro: {vb.assigned_macro_name or 'None'}"
+        tip = f"Mapped: {vb.describe_trigger() or 'None'}\nMacro: {vb.assigned_macro_name or 'None'}"
+        if vb.layer_target:
+            tip += f"\nLayer: {vb.layer_mode} '{vb.layer_target}'"
         item.setToolTip(tip)
 
-        if vb.mapped_key:
+        if vb.mapped_key or vb.trigger_keys:
             item.setBackground(QColor("#fffacd"))
         else:
             item.setBackground(QColor("white"))
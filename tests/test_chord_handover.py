@@ -0,0 +1,37 @@
+"""A chord that switches layers must still be released after the switch."""
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from benchmarks.headless import HeadlessWindow
+from components.VirtualButton import VirtualButton
+import logic.live as live_logic
+
+
+def _event(key, action):
+    return {"device": {"vid": "046d", "pid": "c077", "product_name": "Pad"},
+            "event": {"keyname": key, "action": action}}
+
+
+def test_handed_over_chord_is_released_in_layer_without_chords():
+    fn = VirtualButton("Fn", 0, 0)
+    fn.trigger_keys = ["a", "b"]
+    fn.layer_mode = "hold"
+    fn.layer_target = "media"
+    media = VirtualButton("Play", 0, 1)
+    media.mapped_key = "c"
+
+    window = HeadlessWindow([fn], {}, {})
+    window.layers.replace_layers({"media": [media]})
+    assert not window.layers.get("media").chords.active
+
+    feed = lambda key, action: live_logic.on_raw_input_batch(window, [_event(key, action)])
+    feed("a", "press")
+    feed("b", "press")
+    assert window.layers.active.name == "media"
+
+    feed("a", "release")
+    feed("b", "release")
+    assert window.layers.active.name == "base"
+    assert window.pressed_keys == {}
+    assert not window.layers.get("media").chords.holding
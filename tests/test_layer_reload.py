@@ -0,0 +1,58 @@
+"""Layers reloaded on the GUI thread are swapped in by the dispatch thread."""
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from benchmarks.headless import HeadlessWindow
+from components.VirtualButton import VirtualButton
+import logic.live as live_logic
+
+
+def _event(key, action):
+    return {"device": {"vid": "046d", "pid": "c077", "product_name": "Pad"},
+            "event": {"keyname": key, "action": action}}
+
+
+def _media():
+    play = VirtualButton("Play", 0, 1)
+    play.mapped_key = "c"
+    return [play]
+
+
+def test_reload_while_a_layer_key_is_held():
+    fn = VirtualButton("Fn", 0, 0)
+    fn.mapped_key = "f"
+    fn.layer_mode = "hold"
+    fn.layer_target = "media"
+    window = HeadlessWindow([fn], {}, {})
+    window.layers.replace_layers({"media": _media()})
+    feed = lambda key, action: live_logic.on_raw_input_batch(window, [_event(key, action)])
+
+    feed("f", "press")
+    held = window.layers.active
+    assert held.name == "media"
+
+    window.layers.replace_layers({"media": _media()})  # e.g. a save on the GUI thread
+    assert window.layers.active is held  # Not swapped until the dispatch thread runs
+    replacement = window.layers.get("media")
+    assert replacement is not held
+
+    feed("f", "release")
+    assert window.layers.active is window.layers.base
+    assert window.layers.get("media") is replacement
+
+
+def test_reload_that_drops_the_active_layer_returns_to_base():
+    fn = VirtualButton("Fn", 0, 0)
+    fn.mapped_key = "f"
+    fn.layer_mode = "switch"
+    fn.layer_target = "media"
+    window = HeadlessWindow([fn], {}, {})
+    window.layers.replace_layers({"media": _media()})
+    feed = lambda key, action: live_logic.on_raw_input_batch(window, [_event(key, action)])
+
+    feed("f", "press")
+    assert window.layers.active.name == "media"
+    window.layers.replace_layers({})
+    live_logic.on_raw_input_batch(window, [])
+    assert window.layers.active is window.layers.base
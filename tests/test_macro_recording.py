@@ -0,0 +1,63 @@
+"""Recorded macros must keep every keystroke through the optimizer."""
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PyQt5")
+keyboard = pytest.importorskip("keyboard")
+
+import components.MacroManager as macro_manager
+from components.MacroOptimizer import MacroOptimizer
+from components.MacroTimeline import MacroTimeline
+
+
+def _record(monkeypatch, typed):
+    """Runs MacroManager.record_loop over (time, name, event_type) and returns the macro it emits."""
+    events = queue.Queue()
+    times = iter([t for t, _, _ in typed])
+    for _, name, event_type in typed:
+        events.put(SimpleNamespace(name=name, event_type=event_type))
+    monkeypatch.setattr(macro_manager, "time", SimpleNamespace(time=lambda: next(times)))
+
+    recorded = []
+    recorder = SimpleNamespace(
+        recording=False, event_queue=events, macro_id="id", macro_name="Hello",
+        macro_recorded=SimpleNamespace(emit=lambda macro_id, data: recorded.append(data)),
+        recording_stopped=SimpleNamespace(emit=lambda: None),
+    )
+    macro_manager.MacroManager.record_loop(recorder)
+    return recorded[0]
+
+
+def test_optimizer_keeps_repeated_keys_of_a_recording(monkeypatch):
+    typed = []
+    for i, key in enumerate("hello"):
+        typed.append((10.0 + i * 0.12, key, keyboard.KEY_DOWN))
+        typed.append((10.05 + i * 0.12, key, keyboard.KEY_UP))
+    macro = _record(monkeypatch, typed)
+    assert [step["delay"] for step in macro["steps"]] == [0.0, 0.12, 0.24, 0.36, 0.48]
+
+    optimized, report = MacroOptimizer().optimize(macro)
+    assert report["dropped"] == 0
+    assert report["injections_after"] == report["injections_before"] == 10
+    timeline = MacroTimeline.compile(optimized)
+    assert [n for n, a in zip(timeline.names, timeline.actions) if a == 0] == list("hello")
+
+
+def test_auto_repeat_presses_are_kept_as_taps(monkeypatch):
+    typed = [(1.0, "a", keyboard.KEY_DOWN), (1.1, "a", keyboard.KEY_DOWN),  # Auto-repeat while held
+             (1.3, "a", keyboard.KEY_UP), (1.5, "a", keyboard.KEY_DOWN), (1.6, "a", keyboard.KEY_UP)]
+    macro = _record(monkeypatch, typed)
+
+    optimized, report = MacroOptimizer().optimize(macro)
+    assert report["dropped"] == 0
+    assert [(s["delay"], s["duration"]) for s in optimized["steps"]] == [(0.0, 0.1), (0.1, 0.2), (0.5, 0.1)]
+
+
+def test_overlapping_press_of_a_held_key_is_dropped():
+    macro = {"name": "m", "steps": [{"key": "a", "delay": 0.0, "duration": 0.3},
+                                    {"key": "a", "delay": 0.1, "duration": 0.1}]}
+    optimized, report = MacroOptimizer().optimize(macro)
+    assert report["dropped"] == 1
+    assert [(s["delay"], s["duration"]) for s in optimized["steps"]] == [(0.0, 0.3)]
@@ -0,0 +1,19 @@
+"""A layout button whose trigger_keys has a single entry fires like a mapped key."""
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from benchmarks.headless import HeadlessWindow
+from components.VirtualButton import VirtualButton
+import logic.live as live_logic
+
+
+def test_single_trigger_key_is_dispatched():
+    vb = VirtualButton.from_dict({"name": "A", "start_row": 0, "start_col": 0,
+                                  "trigger_keys": ["kp_1"], "assigned_macro_id": "m"})
+    assert (vb.mapped_key, vb.trigger_keys, vb.describe_trigger()) == ("kp_1", None, "kp_1")
+
+    macros = {"m": {"name": "m", "steps": [{"key": "x", "delay": 0, "duration": 0}]}}
+    window = HeadlessWindow([vb], macros, {})
+    live_logic.on_raw_input_batch(window, [{"device": {}, "event": {"keyname": "kp_1", "action": "press"}}])
+    assert window.macro_runner.stats()[1]["A"]["started"] == 1
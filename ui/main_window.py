@@ -6,6 +6,7 @@ from PyQt5.QtNetwork import QLocalServer
 from PyQt5.QtCore import pyqtSignal, Qt, QTimer, QEvent, QDataStream, QDateTime
 from PyQt5.QtGui import QIcon
 from constants import CELL_SIZE, LISTENER_FILE, UNIQUE_APP_ID
+import time
 
 from ui.menu_bar import setup_menu_bar
 from ui.vcontrols_layout import setup_vcontrols_layout
@@ -19,14 +20,23 @@ import logic.control as control_logic
 import logic.live as live_logic
 import logic.menu as menu_logic
 import logic.data as data_logic
+import logic.layers as layers_logic
 
 from components.RawInputReceiver import RawInputReceiver
+from components.LayerStack import LayerStack
+from components.MacroScheduler import MacroScheduler
+from components.MacroRunner import MacroRunner
+from components.TurboEngine import TurboEngine
+from components.KeyOutput import create_backend
 
 
 class MainWindow(QMainWindow):
     highlight_signal = pyqtSignal(object, bool)  # vb, highlight_on_or_off
     key_mapped_signal = pyqtSignal()
     update_info_label = pyqtSignal(str)
+    log_signal = pyqtSignal(str)  # log_message from non-GUI threads
+    key_captured_signal = pyqtSignal(object, str, str, str)  # vb, key, device_path, device_name
+    layer_changed_signal = pyqtSignal(str)  # Name of the layer a layer key switched to
 
     def __init__(self, tray_mode=False):
         super().__init__()
@@ -43,8 +53,15 @@ class MainWindow(QMainWindow):
         self.tray_mode = tray_mode
         self.tray_icon = None
         self.settings = data_logic.load_settings(self)
+        self.key_output = create_backend(self.settings.get("key_output", "keyboard"))
+        live_logic.compile_macros(self)
         self.mapping_key_process = False
-        self.pressed_keys = set()
+        self.pressed_keys = {}  # (device path, key) currently held -> buttons it pressed
+        self.layers = LayerStack(device_filtering=self.settings.get("device_filtering", False))
+        self.macro_scheduler = MacroScheduler(precise=self.settings.get("precise_macro_timing", False),
+                                              high_priority=self.settings.get("macro_thread_priority", False))
+        self.macro_runner = MacroRunner(self.macro_scheduler, self.settings.get("max_macro_runs", 32))
+        self.turbo = TurboEngine(self.macro_scheduler, self.settings.get("turbo_overrun", "skip"))
         self.mapping_target = None
 
         self._init_ui()
@@ -99,18 +116,36 @@ class MainWindow(QMainWindow):
         self.action_open.triggered.connect(lambda: menu_logic.open_layout(self))
         self.action_new.triggered.connect(lambda: menu_logic.create_new_layout(self))
         self.action_macro_mgr.triggered.connect(lambda: menu_logic.open_macro_manager(self))
+        self.action_optimize_macros.triggered.connect(lambda: menu_logic.optimize_macros(self))
         self.action_run_bg.triggered.connect(lambda: menu_logic.run_current_layout_in_background(self))
         self.choose_startup_action.triggered.connect(lambda: menu_logic.choose_startup_layout(self))
         self.device_filtering_action.toggled.connect(lambda checked: menu_logic.on_device_filtering_toggled(self, checked))
+        self.action_dump_latency.triggered.connect(lambda: menu_logic.dump_latency_stats(self))
+        self.action_record_capture.toggled.connect(lambda checked: menu_logic.toggle_input_capture(self, checked))
 
         self.highlight_signal.connect(lambda vb, highlight_on: table_logic.set_button_highlight(self, vb, highlight_on))
         self.table.cellClicked.connect(lambda row, col: table_logic.handle_cell_click(self, row, col))
         self.key_mapped_signal.connect(lambda: table_logic.update_table(self))
         self.update_info_label.connect(self.info_label.setText)
+        self.log_signal.connect(self.log_message)
+        self.key_captured_signal.connect(lambda vb, key, path, name: live_logic.apply_captured_key(self, vb, key, path, name))
+        self.layer_changed_signal.connect(lambda name: layers_logic.on_layer_changed(self, name))
+        layers_logic.preload_layers(self)
+
+        self.macro_scheduler.start()
 
         # --- RawInputReceiver Setup ---
-        self.receiver = RawInputReceiver(listen_port=5005)
-        self.receiver.raw_input_signal.connect(lambda event: live_logic.on_raw_input(self, event))
+        self.receiver = RawInputReceiver(
+            listen_port=5005,
+            udp_events=self.settings.get("udp_events", False),
+            queue_size=self.settings.get("queue_size", 4096),
+            overflow_policy=self.settings.get("queue_overflow", "drop_oldest"),
+            discovery_multicast_group=self.settings.get("discovery_multicast_group"),
+        )
+        # Matching and macro launch run on the receiver's dispatch thread;
+        # only widget updates are marshalled back here through signals.
+        self.receiver.set_dispatch_handler(lambda events: live_logic.on_raw_input_batch(self, events),
+                                           lambda: self.layers.active.chords.next_timeout(time.perf_counter()))
         self.receiver.status_signal.connect(lambda msg: self.update_info_label.emit(msg))
         self.receiver.start()
 
@@ -213,6 +248,11 @@ class MainWindow(QMainWindow):
                 self.tray_icon.hide()
             if hasattr(self, "receiver"):
                 self.receiver.stop()
+            self.turbo.stop_all()
+            self.macro_runner.clear_queues()
+            self.macro_scheduler.cancel_all()
+            self.macro_scheduler.stop()
+            self.key_output.close()
             super().closeEvent(event)
         else:
             event.ignore()
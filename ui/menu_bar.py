@@ -26,6 +26,8 @@ def setup_menu_bar(parent):
     macros_menu = menubar.addMenu("Macros")
     parent.action_macro_mgr = QAction("Open Macro Manager", parent)
     macros_menu.addAction(parent.action_macro_mgr)
+    parent.action_optimize_macros = QAction("Optimize Macros", parent)
+    macros_menu.addAction(parent.action_optimize_macros)
 
     # ─── Run Menu ──────────────────────────────────────────
     run_menu = menubar.addMenu("Run")
@@ -40,3 +42,8 @@ def setup_menu_bar(parent):
     parent.device_filtering_action = QAction("Enable Device Filtering", parent)
     parent.device_filtering_action.setCheckable(True)
     adv_menu.addAction(parent.device_filtering_action)
+    parent.action_dump_latency = QAction("Dump Latency Stats", parent)
+    adv_menu.addAction(parent.action_dump_latency)
+    parent.action_record_capture = QAction("Record Input Capture", parent)
+    parent.action_record_capture.setCheckable(True)
+    adv_menu.addAction(parent.action_record_capture)